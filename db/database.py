@@ -1,13 +1,18 @@
-import json
+import io
 import os
+import re
+import tempfile
 import time
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
 from typing import TYPE_CHECKING, Optional
+from bisect import bisect_right
 from collections import defaultdict
 
 import httpx
 import numpy as np
+import orjson
 
 from settings import app_logger
 
@@ -28,6 +33,33 @@ PRECOMPUTED_SERVERS_URL = f"{GITHUB_RELEASE_BASE}/servers.json"
 PRECOMPUTED_EMBEDDINGS_URL = f"{GITHUB_RELEASE_BASE}/embeddings.npz"
 PRECOMPUTED_DATA_INFO_URL = f"{GITHUB_RELEASE_BASE}/data_info.json"
 
+# Source-tier categories say where a server was listed, not what it does, so
+# they are never used to narrow a search
+TIER_CATEGORIES = frozenset({"reference", "archived", "official", "community"})
+# Keyword-search boost for servers from the more trusted tiers
+CATEGORY_BOOSTS = {"reference": 5.0, "official": 3.0}
+
+# Number of recent (query, limit) results MCPDatabase.search() keeps
+SEARCH_CACHE_SIZE = 256
+
+# Server list parsing: one scan finds category headers and "- " entry lines
+_OFFICIAL_CATEGORY_HEADERS = {
+    "## 🌟 Reference Servers": "reference",
+    "### Archived": "archived",
+    "### 🎖️ Official Integrations": "official",
+    "### 🌎 Community Servers": "community",
+}
+_SERVER_LIST_LINE_RE = re.compile(
+    r"^[^\S\n]*(?:(?P<header>"
+    + "|".join(re.escape(header) for header in _OFFICIAL_CATEGORY_HEADERS)
+    + r")|(?P<entry>- .*))",
+    re.MULTILINE,
+)
+_IMG_RE = re.compile(r"<img[^>]*?>")
+_WS_RE = re.compile(r"\s+")
+# Pattern: - **[Name](url)** - Description (with flexible spacing)
+_ENTRY_RE = re.compile(r"-\s*\*\*\[([^\]]+)\]\(([^)]+)\)\*\*\s*-\s*(.+)")
+
 if TYPE_CHECKING:
     from .semantic_search import SemanticSearchEngine
 
@@ -40,9 +72,14 @@ def get_server_cache_dir() -> Path:
     else:
         cache_base = Path.home() / ".cache"
     
-    cache_dir = cache_base / "mcp-mcp" / "servers"
-    cache_dir.mkdir(parents=True, exist_ok=True)
-    return cache_dir
+    return _ensure_dir(cache_base / "mcp-mcp" / "servers")
+
+
+@lru_cache(maxsize=None)
+def _ensure_dir(path: Path) -> Path:
+    """Create a directory once per process; keyed by path so XDG_CACHE_HOME changes still apply."""
+    path.mkdir(parents=True, exist_ok=True)
+    return path
 
 
 def get_server_cache_path() -> Path:
@@ -50,7 +87,19 @@ def get_server_cache_path() -> Path:
     return get_server_cache_dir() / "server_list.json"
 
 
-@dataclass
+def write_bytes_atomic(path: Path, data: bytes) -> None:
+    """Write a file via a temporary sibling and rename, so readers never see a partial file."""
+    fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temp_name, path)
+    except BaseException:
+        Path(temp_name).unlink(missing_ok=True)
+        raise
+
+
+@dataclass(slots=True, frozen=True)
 class MCPServerEntry:
     name: str
     description: str
@@ -59,46 +108,55 @@ class MCPServerEntry:
     source: str = "unknown"
 
 
-def parse_mcp_server_list(mcp_server_list: str) -> list[MCPServerEntry]:
-    import re
+@dataclass(slots=True)
+class _IndexedEntry:
+    """A server with the lowercased, tokenized text keyword scoring needs."""
+    server: MCPServerEntry
+    name_lower: str
+    desc_lower: str
+    name_words: frozenset[str]
+    desc_words: frozenset[str]
 
+    @classmethod
+    def from_server(cls, server: MCPServerEntry) -> "_IndexedEntry":
+        name_lower = server.name.lower()
+        desc_lower = server.description.lower()
+        return cls(
+            server=server,
+            name_lower=name_lower,
+            desc_lower=desc_lower,
+            name_words=frozenset(name_lower.split()),
+            desc_words=frozenset(desc_lower.split()),
+        )
+
+
+def parse_mcp_server_list(mcp_server_list: str) -> list[MCPServerEntry]:
     servers = []
-    lines = mcp_server_list.split("\n")
     current_category = None
 
-    for line in lines:
-        line = line.strip()
-
+    for line_match in _SERVER_LIST_LINE_RE.finditer(mcp_server_list):
         # Detect category sections
-        if line.startswith("## 🌟 Reference Servers"):
-            current_category = "reference"
-            continue
-        elif line.startswith("### Archived"):
-            current_category = "archived"
-            continue
-        elif line.startswith("### 🎖️ Official Integrations"):
-            current_category = "official"
-            continue
-        elif line.startswith("### 🌎 Community Servers"):
-            current_category = "community"
+        header = line_match.group("header")
+        if header is not None:
+            current_category = _OFFICIAL_CATEGORY_HEADERS[header]
             continue
 
         # Parse server entries (lines starting with -)
-        if line.startswith("- ") and current_category:
+        if current_category:
+            line = line_match.group("entry")
+
             # Handle different patterns:
             # - **[Name](url)** - Description
             # - <img...> **[Name](url)** - Description
 
             # Remove image tags if present
-            clean_line = re.sub(r"<img[^>]*?>", "", line)
-            clean_line = re.sub(r"\s+", " ", clean_line)  # Normalize whitespace
+            if "<img" in line:
+                line = _IMG_RE.sub("", line)
+            clean_line = _WS_RE.sub(" ", line)  # Normalize whitespace
             clean_line = clean_line.strip()
 
             # Extract name, url, and description
-            # Pattern: - **[Name](url)** - Description (with flexible spacing)
-            match = re.search(
-                r"-\s*\*\*\[([^\]]+)\]\(([^)]+)\)\*\*\s*-\s*(.+)", clean_line
-            )
+            match = _ENTRY_RE.search(clean_line)
             if match:
                 name = match.group(1)
                 url = match.group(2)
@@ -171,14 +229,109 @@ def deduplicate_servers(all_servers: list[MCPServerEntry]) -> list[MCPServerEntr
 class MCPDatabase:
     servers: list[MCPServerEntry]
     semantic_engine: Optional["SemanticSearchEngine"] = None
+    _category_rows: dict[str, np.ndarray] = field(default_factory=dict, init=False, repr=False)
+    _category_candidates: dict[str, np.ndarray] = field(default_factory=dict, init=False, repr=False)
+    _category_tokens: dict[str, frozenset[str]] = field(default_factory=dict, init=False, repr=False)
+    _indexed: list[_IndexedEntry] = field(default_factory=list, init=False, repr=False)
+    _vocab: dict[str, int] = field(default_factory=dict, init=False, repr=False)
+    _vocab_words: list[str] = field(default_factory=list, init=False, repr=False)
+    _name_postings: list[np.ndarray] = field(default_factory=list, init=False, repr=False)
+    _desc_postings: list[np.ndarray] = field(default_factory=list, init=False, repr=False)
+    _fuzzy_text: str = field(default="", init=False, repr=False)
+    _fuzzy_starts: list[int] = field(default_factory=list, init=False, repr=False)
+    _fuzzy_ids: list[int] = field(default_factory=list, init=False, repr=False)
+    _search_cache: dict[tuple[str, int], tuple[MCPServerEntry, ...]] = field(
+        default_factory=dict, init=False, repr=False
+    )
+
+    def __post_init__(self) -> None:
+        self._build_indexes()
 
     @classmethod
     async def create(cls) -> "MCPDatabase":
         mcp_db = cls(servers=[])
         await mcp_db._load_servers()
+        mcp_db._build_indexes()
         await mcp_db._initialize_semantic_search()
         return mcp_db
 
+    def _build_indexes(self) -> None:
+        """Precompute per-server lookup structures used by search()."""
+        self._search_cache.clear()
+        self._indexed = [_IndexedEntry.from_server(server) for server in self.servers]
+
+        # Inverted index: word id -> rows whose name / description contains it
+        name_postings = defaultdict(list)
+        desc_postings = defaultdict(list)
+        for i, entry in enumerate(self._indexed):
+            for word in entry.name_words:
+                name_postings[word].append(i)
+            for word in entry.desc_words:
+                desc_postings[word].append(i)
+
+        self._vocab_words = list(name_postings.keys() | desc_postings.keys())
+        self._vocab = {word: word_id for word_id, word in enumerate(self._vocab_words)}
+        self._name_postings = [
+            np.array(name_postings.get(word, ()), dtype=np.intp) for word in self._vocab_words
+        ]
+        self._desc_postings = [
+            np.array(desc_postings.get(word, ()), dtype=np.intp) for word in self._vocab_words
+        ]
+
+        # Words of 3+ characters joined into one string so fuzzy lookups run in str.find
+        self._fuzzy_ids = [i for i, word in enumerate(self._vocab_words) if len(word) >= 3]
+        self._fuzzy_starts = []
+        offset = 0
+        for word_id in self._fuzzy_ids:
+            self._fuzzy_starts.append(offset)
+            offset += len(self._vocab_words[word_id]) + 1
+        self._fuzzy_text = "\n".join(self._vocab_words[i] for i in self._fuzzy_ids)
+
+        self._category_boost = np.array(
+            [CATEGORY_BOOSTS.get(server.category, 0.0) for server in self.servers], dtype=np.float64
+        )
+
+        rows_by_category = defaultdict(list)
+        for i, server in enumerate(self.servers):
+            rows_by_category[server.category].append(i)
+
+        self._category_rows = {
+            category: np.fromiter(rows, dtype=np.int32, count=len(rows))
+            for category, rows in rows_by_category.items()
+        }
+        # Reference/official/... servers carry a tier instead of a topic, so they
+        # share every topical category's tie-break preference
+        tier_rows = [
+            rows for category, rows in self._category_rows.items()
+            if category.lower() in TIER_CATEGORIES
+        ]
+        tier_rows = np.concatenate(tier_rows) if tier_rows else np.empty(0, dtype=np.int32)
+
+        # Topical categories like "browser-automation" -> {"browser", "automation"}
+        self._category_tokens = {}
+        self._category_candidates = {}
+        for category, rows in self._category_rows.items():
+            tokens = frozenset(t for t in re.split(r"[^a-z0-9]+", category.lower()) if t)
+            if tokens and category.lower() not in TIER_CATEGORIES:
+                self._category_tokens[category] = tokens
+                self._category_candidates[category] = np.union1d(rows, tier_rows)
+
+    def _guess_category(self, query_words: set[str]) -> Optional[str]:
+        """
+        Cheap check for a query that names a category outright.
+
+        A category wins only if all of its tokens appear in the query and no
+        other category matches as well, so ambiguous queries score everything.
+        """
+        best, best_size, tied = None, 0, False
+        for category, tokens in self._category_tokens.items():
+            if tokens <= query_words:
+                if len(tokens) > best_size:
+                    best, best_size, tied = category, len(tokens), False
+                elif len(tokens) == best_size:
+                    tied = True
+        return None if tied else best
+
     async def _load_servers(self) -> None:
         """Load servers from multiple sources with caching and deduplication."""
         # Try loading from precomputed data first (fastest)
@@ -345,15 +498,10 @@ class MCPDatabase:
                 response = await client.get(PRECOMPUTED_EMBEDDINGS_URL)
                 
                 if response.status_code == 200:
-                    # Save to temporary file and load with numpy
-                    temp_file = get_server_cache_dir() / "temp_precomputed_embeddings.npz"
-                    temp_file.write_bytes(response.content)
-                    
-                    embeddings_data = np.load(temp_file)
-                    embeddings = embeddings_data['embeddings']
+                    from .semantic_search import embeddings_from_npz
                     
-                    # Clean up temporary file
-                    temp_file.unlink()
+                    # Load straight from memory, no temporary file
+                    embeddings = embeddings_from_npz(np.load(io.BytesIO(response.content)))
                     
                     logger.debug(f"Downloaded precomputed embeddings: {embeddings.shape} (schema v{data_info.get('schema_version', 'unknown')})")
                     return embeddings
@@ -387,8 +535,7 @@ class MCPDatabase:
                 return None
             
             # Load cached data
-            with open(cache_path, 'r', encoding='utf-8') as f:
-                cache_data = json.load(f)
+            cache_data = orjson.loads(cache_path.read_bytes())
             
             # Convert back to MCPServerEntry objects
             servers_data = cache_data.get('servers', [])
@@ -418,13 +565,12 @@ class MCPDatabase:
         
         try:
             cache_data = {
-                'servers': [asdict(server) for server in servers],
+                'servers': servers,
                 'timestamp': time.time(),
                 'version': 'multi-source-v1'
             }
             
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=2)
+            write_bytes_atomic(cache_path, orjson.dumps(cache_data, option=orjson.OPT_INDENT_2))
             
             logger.debug(f"Saved {len(servers)} servers to cache: {cache_path}")
             
@@ -458,104 +604,159 @@ class MCPDatabase:
             )
             self.semantic_engine = None
 
-    def search(self, query: str) -> list[MCPServerEntry]:
+    def search(self, query: str, limit: int = 20) -> list[MCPServerEntry]:
         """
         Search for MCP servers using semantic similarity.
         Falls back to keyword search if semantic search is unavailable.
+        Returns at most `limit` servers, best match first.
         """
         if not query.strip():
             return []
 
+        # Repeated queries reuse the previous ranking until the indexes are rebuilt
+        key = (query, limit)
+        cached = self._search_cache.get(key)
+        if cached is not None:
+            return list(cached)
+
+        results, degraded = self._search(query, limit)
+        # A keyword fallback after a semantic failure is not worth keeping
+        if not degraded:
+            if len(self._search_cache) >= SEARCH_CACHE_SIZE:
+                # Evict the oldest entry; dicts keep insertion order
+                del self._search_cache[next(iter(self._search_cache))]
+            self._search_cache[key] = tuple(results)
+        return results
+
+    def _search(self, query: str, limit: int) -> tuple[list[MCPServerEntry], bool]:
+        """
+        Rank servers for a non-empty query without consulting the result cache.
+
+        Returns the results and whether semantic search failed and keyword
+        search stood in for it.
+        """
         # Try semantic search first
         if self.semantic_engine and self.semantic_engine.is_available():
             try:
+                # Every server is scored; a category named in the query only
+                # breaks exact ties in favour of its rows and the tier servers
+                category = self._guess_category(set(query.lower().split()))
                 semantic_results = self.semantic_engine.semantic_search(
-                    query, top_k=20, similarity_threshold=0.1
+                    query, top_k=limit, similarity_threshold=0.1,
+                    preferred_rows=self._category_candidates.get(category),
                 )
                 # Extract just the servers from (server, score) tuples
-                return [server for server, score in semantic_results]
+                return [server for server, score in semantic_results], False
 
             except Exception as e:
                 logger.warning(
                     f"Semantic search failed, falling back to keyword search: {e}"
                 )
-                return self._keyword_search(query)
+                return self._keyword_search(query, limit), True
         else:
             # Fallback to keyword-only search
             logger.debug("Using keyword-only search (semantic search unavailable)")
-            return self._keyword_search(query)
+            return self._keyword_search(query, limit), False
 
-    def _keyword_search(self, query: str) -> list[MCPServerEntry]:
+    def _keyword_search(self, query: str, limit: int = 20) -> list[MCPServerEntry]:
         """Fallback keyword-based search with relevance scoring."""
         query_lower = query.lower()
         query_words = set(query_lower.split())
+        # Exact and fuzzy word matches, summed per row
+        scores = self._word_scores(query_words)
 
-        results = []
+        # A whole-query substring hit implies an exact or fuzzy word hit unless
+        # every query word is shorter than 3 characters, which needs a full scan
+        if all(len(word) < 3 for word in query_words):
+            rows = np.arange(len(self._indexed))
+        else:
+            rows = np.flatnonzero(scores)
 
-        for server in self.servers:
-            score = self._calculate_relevance_score(server, query_lower, query_words)
-            if score > 0:
-                results.append((score, server))
+        if len(rows):
+            entries = [self._indexed[row] for row in rows.tolist()]
+            # Exact name match 100, partial name match 50, description match 30
+            name_exact = np.fromiter(
+                (query_lower == entry.name_lower for entry in entries), dtype=bool, count=len(entries)
+            )
+            in_name = np.fromiter(
+                (query_lower in entry.name_lower for entry in entries), dtype=bool, count=len(entries)
+            )
+            in_desc = np.fromiter(
+                (query_lower in entry.desc_lower for entry in entries), dtype=bool, count=len(entries)
+            )
+            scores[rows] += np.where(name_exact, 100.0, np.where(in_name, 50.0, 0.0)) + np.where(in_desc, 30.0, 0.0)
 
-        # Sort by relevance score (highest first) and return servers
-        results.sort(key=lambda x: x[0], reverse=True)
-        return [server for _, server in results]
+        # Category boost only for servers that already match the query
+        matched = np.flatnonzero(scores > 0)
+        matched_scores = scores[matched] + self._category_boost[matched]
 
-    def _calculate_relevance_score(
-        self, server: MCPServerEntry, query_lower: str, query_words: set[str]
-    ) -> float:
-        """Calculate relevance score for a server based on query."""
-        score = 0.0
+        # Top results by relevance score; ties keep server order like a stable sort
+        order = np.argsort(-matched_scores, kind="stable")[:limit]
+        return [self.servers[row] for row in matched[order].tolist()]
 
-        name_lower = server.name.lower()
-        desc_lower = server.description.lower()
+    def _word_scores(self, query_words: set[str]) -> np.ndarray:
+        """
+        Per-row score from exact and fuzzy word matches.
 
-        # Exact name match gets highest score
-        if query_lower == name_lower:
-            score += 100
-
-        # Partial name match gets high score
-        elif query_lower in name_lower:
-            score += 50
-
-        # Exact description match gets good score
-        if query_lower in desc_lower:
-            score += 30
-
-        # Word-based scoring
-        name_words = set(name_lower.split())
-        desc_words = set(desc_lower.split())
-
-        # Count exact word matches in name (higher weight)
-        name_matches = len(query_words.intersection(name_words))
-        score += name_matches * 20
-
-        # Count exact word matches in description
-        desc_matches = len(query_words.intersection(desc_words))
-        score += desc_matches * 10
-
-        # Partial word matches (fuzzy matching) - more restrictive
-        for query_word in query_words:
-            if len(query_word) >= 3:  # Only do fuzzy matching for words >= 3 chars
-                for name_word in name_words:
-                    if len(name_word) >= 3 and (
-                        query_word in name_word or name_word in query_word
-                    ):
-                        score += 5
-                for desc_word in desc_words:
-                    if len(desc_word) >= 3 and (
-                        query_word in desc_word or desc_word in query_word
-                    ):
-                        score += 2
-
-        # Category boost for reference servers (only if there's already some content match)
-        if score > 0:  # Only apply category boost if there's already a content match
-            if server.category == "reference":
-                score += 5
-            elif server.category == "official":
-                score += 3
-
-        return score
+        Exact matches weigh 20 in the name and 10 in the description; each
+        (query word, server word) pair of 3+ characters where one contains the
+        other weighs 5 and 2. All contributions are summed with one bincount
+        over the matching postings.
+        """
+        weighted = []  # (word id, name weight, description weight)
+        for word in query_words:
+            word_id = self._vocab.get(word)
+            if word_id is not None:
+                weighted.append((word_id, 20, 10))
+
+        pair_counts = defaultdict(int)
+        for word in query_words:
+            if len(word) >= 3:
+                for word_id in self._fuzzy_matches(word):
+                    pair_counts[word_id] += 1
+        for word_id, pairs in pair_counts.items():
+            weighted.append((word_id, 5 * pairs, 2 * pairs))
+
+        rows = []
+        weights = []
+        for word_id, name_weight, desc_weight in weighted:
+            for postings, weight in (
+                (self._name_postings[word_id], name_weight),
+                (self._desc_postings[word_id], desc_weight),
+            ):
+                rows.append(postings)
+                weights.append(np.full(len(postings), weight, dtype=np.float64))
+
+        if not rows:
+            return np.zeros(len(self._indexed))
+        return np.bincount(
+            np.concatenate(rows), weights=np.concatenate(weights), minlength=len(self._indexed)
+        )
+
+    def _fuzzy_matches(self, word: str) -> set[int]:
+        """Ids of vocabulary words of 3+ characters that contain or are contained in word."""
+        matches = set()
+
+        # Vocabulary words containing word
+        text = self._fuzzy_text
+        position = text.find(word)
+        while position != -1:
+            index = bisect_right(self._fuzzy_starts, position) - 1
+            matches.add(self._fuzzy_ids[index])
+            # Skip to the next vocabulary word
+            word_end = text.find("\n", position)
+            if word_end == -1:
+                break
+            position = text.find(word, word_end + 1)
+
+        # Vocabulary words contained in word
+        for start in range(len(word) - 2):
+            for end in range(start + 3, len(word) + 1):
+                word_id = self._vocab.get(word[start:end])
+                if word_id is not None:
+                    matches.add(word_id)
+
+        return matches
 
     def get_search_info(self) -> dict:
         """Get information about the search capabilities."""
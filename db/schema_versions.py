@@ -15,7 +15,7 @@ class CompatibilityLevel(Enum):
 
 
 # Current schema configuration
-CURRENT_SCHEMA_VERSION = "1.0"
+CURRENT_SCHEMA_VERSION = "1.1"  # 1.1: int8 embeddings with per-row "scales"
 MIN_COMPATIBLE_VERSION = "1.0"
 MAX_COMPATIBLE_VERSION = "1.999"  # Support all 1.x versions
 
@@ -1,16 +1,17 @@
 """Semantic search functionality for MCP server discovery using sentence transformers."""
 
 import hashlib
+import io
 import json
 import os
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
 import numpy as np
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
 
-from .database import MCPServerEntry
+from .database import MCPServerEntry, write_bytes_atomic
 from settings import app_logger
 
 logger = app_logger.getChild(__name__)
@@ -18,6 +19,7 @@ logger = app_logger.getChild(__name__)
 # Model configuration
 DEFAULT_MODEL = "all-MiniLM-L6-v2"  # Fast, lightweight, good quality
 EMBEDDINGS_VERSION = "v1"  # Increment when changing embedding logic
+ENCODE_BATCH_SIZE = 128
 
 
 def get_cache_dir() -> Path:
@@ -34,6 +36,40 @@ def get_cache_dir() -> Path:
     return cache_dir
 
 
+def normalize_embeddings(embeddings: np.ndarray) -> np.ndarray:
+    """L2-normalize embedding rows so cosine similarity becomes a dot product."""
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0  # Leave all-zero rows as they are, like cosine_similarity
+    return embeddings / norms
+
+
+def quantize_embeddings(embeddings: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Quantize embeddings to int8 with one float32 scale per row.
+    
+    Each row is scaled so its largest component maps to +/-127, which keeps
+    its direction (and so cosine similarity) to within about 1%.
+    """
+    scales = np.abs(embeddings).max(axis=1, keepdims=True) / 127
+    scales[scales == 0] = 1.0
+    values = np.round(embeddings / scales).astype(np.int8)
+    return values, scales.astype(np.float32)
+
+
+def embeddings_from_npz(npz) -> np.ndarray:
+    """Read the embeddings matrix from an embeddings.npz, dequantizing int8 data."""
+    embeddings = npz["embeddings"]
+    if "scales" in npz.files:
+        return embeddings.astype(np.float32) * npz["scales"]
+    return embeddings
+
+
+@lru_cache(maxsize=None)
+def load_model(model_name: str) -> SentenceTransformer:
+    """Load a sentence transformer model once per process; engines share it."""
+    return SentenceTransformer(model_name)
+
+
 class SemanticSearchEngine:
     """Semantic search engine for MCP servers using sentence transformers."""
     
@@ -96,7 +132,9 @@ class SemanticSearchEngine:
         """Save embeddings to cache."""
         cache_path = self._get_cache_path(content_hash)
         try:
-            np.save(cache_path, embeddings)
+            buffer = io.BytesIO()
+            np.save(buffer, embeddings)
+            write_bytes_atomic(cache_path, buffer.getvalue())
             logger.debug(f"Saved embeddings to cache: {cache_path}")
         except Exception as e:
             logger.warning(f"Failed to save embeddings to cache: {e}")
@@ -124,7 +162,7 @@ class SemanticSearchEngine:
         # Try to load from cache first
         cached_embeddings = self._load_cached_embeddings(content_hash)
         if cached_embeddings is not None:
-            self.server_embeddings = cached_embeddings
+            self.server_embeddings = normalize_embeddings(cached_embeddings)
             logger.info(f"Using cached embeddings for {len(servers)} servers")
             return
         
@@ -132,7 +170,7 @@ class SemanticSearchEngine:
         if self.model is None:
             logger.info(f"Loading sentence transformer model: {self.model_name}")
             try:
-                self.model = SentenceTransformer(self.model_name)
+                self.model = load_model(self.model_name)
                 logger.info("Model loaded successfully")
             except Exception as e:
                 logger.error(f"Failed to load model {self.model_name}: {e}")
@@ -146,7 +184,9 @@ class SemanticSearchEngine:
             # Generate embeddings in batch for efficiency
             self.server_embeddings = self.model.encode(
                 texts,
+                batch_size=ENCODE_BATCH_SIZE,
                 convert_to_numpy=True,
+                normalize_embeddings=True,
                 show_progress_bar=True if len(texts) > 10 else False
             )
             logger.info("Embeddings generated successfully")
@@ -168,7 +208,6 @@ class SemanticSearchEngine:
     ):
         """Initialize the semantic search engine with precomputed embeddings."""
         self.servers = servers
-        self.server_embeddings = precomputed_embeddings
         
         # Validate that embeddings match server count
         if len(servers) != precomputed_embeddings.shape[0]:
@@ -177,11 +216,14 @@ class SemanticSearchEngine:
                 f"({precomputed_embeddings.shape[0]})"
             )
         
+        # Older releases ship unnormalized embeddings
+        self.server_embeddings = normalize_embeddings(precomputed_embeddings)
+        
         # Load model for query encoding (still needed for search)
         if self.model is None:
             logger.info(f"Loading sentence transformer model: {self.model_name}")
             try:
-                self.model = SentenceTransformer(self.model_name)
+                self.model = load_model(self.model_name)
                 logger.info("Model loaded successfully")
             except Exception as e:
                 logger.error(f"Failed to load model {self.model_name}: {e}")
@@ -197,7 +239,8 @@ class SemanticSearchEngine:
         self, 
         query: str, 
         top_k: int = 10,
-        similarity_threshold: float = 0.1
+        similarity_threshold: float = 0.1,
+        preferred_rows: Optional[np.ndarray] = None
     ) -> list[tuple[MCPServerEntry, float]]:
         """
         Perform semantic search for MCP servers.
@@ -206,6 +249,7 @@ class SemanticSearchEngine:
             query: Search query
             top_k: Maximum number of results to return
             similarity_threshold: Minimum similarity score (0-1)
+            preferred_rows: Optional server indices that win ties on equal scores
             
         Returns:
             List of (server, similarity_score) tuples, sorted by similarity
@@ -218,27 +262,28 @@ class SemanticSearchEngine:
         
         # Generate query embedding
         try:
-            query_embedding = self.model.encode([query], convert_to_numpy=True)
+            query_embedding = self.model.encode([query], convert_to_numpy=True, normalize_embeddings=True)[0]
         except Exception as e:
             logger.error(f"Failed to encode query: {e}")
             return []
         
-        # Compute similarities
+        # Compute similarities; both sides are normalized, so cosine is a dot product
         try:
-            similarities = cosine_similarity(query_embedding, self.server_embeddings)[0]
+            similarities = self.server_embeddings @ query_embedding
         except Exception as e:
             logger.error(f"Failed to compute similarities: {e}")
             return []
         
-        # Create results with similarity scores
-        results = []
-        for i, similarity in enumerate(similarities):
-            if similarity >= similarity_threshold:
-                results.append((self.servers[i], float(similarity)))
-        
-        # Sort by similarity (highest first) and limit results
-        results.sort(key=lambda x: x[1], reverse=True)
-        return results[:top_k]
+        # Keep scores above the threshold, highest first; ties go to preferred
+        # rows, then keep server order
+        selected = np.flatnonzero(similarities >= similarity_threshold)
+        if preferred_rows is None:
+            order = np.argsort(-similarities[selected], kind="stable")
+        else:
+            not_preferred = ~np.isin(selected, preferred_rows)
+            order = np.lexsort((not_preferred, -similarities[selected]))
+        selected = selected[order[:top_k]]
+        return [(self.servers[row], float(similarities[row])) for row in selected.tolist()]
     
     def is_available(self) -> bool:
         """Check if semantic search is available (model loaded and embeddings ready)."""
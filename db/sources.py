@@ -8,16 +8,29 @@ and awesome lists.
 
 import re
 from abc import ABC, abstractmethod
+from pathlib import Path
 from typing import Optional
 from urllib.parse import urljoin
 
 import httpx
+import orjson
 
-from .database import MCPServerEntry
+from .database import MCPServerEntry, get_server_cache_dir, parse_mcp_server_list, write_bytes_atomic
 from settings import app_logger
 
 logger = app_logger.getChild(__name__)
 
+# Line-parsing patterns shared by the source parsers
+_IMG_RE = re.compile(r"<img[^>]*?>")
+_GITHUB_LINK_RE = re.compile(r"\[([^\]]+)\]\((https://github\.com/[^)]+)\)")
+_PUNKPEYE_CATEGORY_RE = re.compile(r"^##\s*[\w\s]*?\s*(.+?)(?:\s*\(.*\))?$")
+_CATEGORY_STRIP_RE = re.compile(r"[^\w\s-]")
+_DESCRIPTION_STRIP_RE = re.compile(r"[^\w\s.,!?()-]")
+_CACHE_SLUG_RE = re.compile(r"[^a-z0-9]+")
+
+# Increment when a parser or MCPServerEntry changes, so cached parses are redone
+SOURCE_CACHE_VERSION = 1
+
 
 class ServerSource(ABC):
     """Abstract base class for MCP server sources."""
@@ -26,22 +39,80 @@ class ServerSource(ABC):
         self.name = name
         self.url = url
     
-    @abstractmethod
-    async def fetch(self) -> str:
-        """Fetch the raw content from the source."""
-        pass
+    async def fetch(
+        self, validators: Optional[dict[str, str]] = None
+    ) -> tuple[Optional[str], dict[str, str]]:
+        """
+        Fetch the raw content from the source.
+        
+        Args:
+            validators: Conditional request headers from the previous fetch
+        
+        Returns:
+            (content, validators), where content is None if the source is unchanged
+        """
+        async with httpx.AsyncClient(timeout=30.0) as client:
+            response = await client.get(self.url, headers=validators)
+            if response.status_code == 304:
+                return None, validators or {}
+            response.raise_for_status()
+            
+            # Headers to send next time so an unchanged source answers 304
+            new_validators = {}
+            if etag := response.headers.get("etag"):
+                new_validators["If-None-Match"] = etag
+            if last_modified := response.headers.get("last-modified"):
+                new_validators["If-Modified-Since"] = last_modified
+            return response.text, new_validators
     
     @abstractmethod
     def parse(self, content: str) -> list[MCPServerEntry]:
         """Parse the content and extract MCP server entries."""
         pass
     
+    @property
+    def cache_path(self) -> Path:
+        """Path of the parsed server list cached for this source."""
+        slug = _CACHE_SLUG_RE.sub("-", self.name.lower()).strip("-")
+        return get_server_cache_dir() / f"source-{slug}.json"
+    
+    def _load_cache(self) -> Optional[tuple[dict[str, str], list[MCPServerEntry]]]:
+        """Load the cached (validators, servers) for this source, if any."""
+        try:
+            cache_data = orjson.loads(self.cache_path.read_bytes())
+            if cache_data.get('version') != SOURCE_CACHE_VERSION:
+                # Parsed by older code; refetch in full rather than revalidate
+                logger.debug(f"Ignoring outdated cache for {self.name}")
+                return None
+            return cache_data['validators'], [MCPServerEntry(**server) for server in cache_data['servers']]
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.debug(f"Ignoring unreadable cache for {self.name}: {e}")
+            return None
+    
+    def _save_cache(self, validators: dict[str, str], servers: list[MCPServerEntry]) -> None:
+        """Save the parsed servers together with the validators they were fetched with."""
+        try:
+            write_bytes_atomic(self.cache_path, orjson.dumps(
+                {'version': SOURCE_CACHE_VERSION, 'validators': validators, 'servers': servers}
+            ))
+        except Exception as e:
+            logger.warning(f"Failed to cache servers from {self.name}: {e}")
+    
     async def get_servers(self) -> list[MCPServerEntry]:
-        """Get all servers from this source."""
+        """Get all servers from this source, revalidating the cached list with a conditional GET."""
         try:
             logger.info(f"Fetching servers from {self.name}")
-            content = await self.fetch()
+            cached = self._load_cache()
+            content, validators = await self.fetch(cached[0] if cached else None)
+            if content is None:
+                # 304 Not Modified: the cached parse is still current
+                logger.info(f"{self.name} unchanged, using {len(cached[1])} cached servers")
+                return cached[1]
             servers = self.parse(content)
+            if validators:
+                self._save_cache(validators, servers)
             logger.info(f"Found {len(servers)} servers from {self.name}")
             return servers
         except Exception as e:
@@ -58,73 +129,9 @@ class OfficialMCPSource(ServerSource):
             url="https://raw.githubusercontent.com/modelcontextprotocol/servers/refs/heads/main/README.md"
         )
     
-    async def fetch(self) -> str:
-        """Fetch the official MCP servers README."""
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(self.url)
-            response.raise_for_status()
-            return response.text
-    
     def parse(self, content: str) -> list[MCPServerEntry]:
         """Parse the official MCP servers README format."""
-        servers = []
-        lines = content.split("\n")
-        current_category = None
-
-        for line in lines:
-            line = line.strip()
-
-            # Detect category sections
-            if line.startswith("## 🌟 Reference Servers"):
-                current_category = "reference"
-                continue
-            elif line.startswith("### Archived"):
-                current_category = "archived"
-                continue
-            elif line.startswith("### 🎖️ Official Integrations"):
-                current_category = "official"
-                continue
-            elif line.startswith("### 🌎 Community Servers"):
-                current_category = "community"
-                continue
-
-            # Parse server entries (lines starting with -)
-            if line.startswith("- ") and current_category:
-                server = self._parse_server_line(line, current_category)
-                if server:
-                    servers.append(server)
-
-        return servers
-    
-    def _parse_server_line(self, line: str, category: str) -> Optional[MCPServerEntry]:
-        """Parse a single server line from the official format."""
-        # Remove image tags if present
-        clean_line = re.sub(r"<img[^>]*?>", "", line)
-        clean_line = re.sub(r"\s+", " ", clean_line)  # Normalize whitespace
-        clean_line = clean_line.strip()
-
-        # Extract name, url, and description
-        # Pattern: - **[Name](url)** - Description (with flexible spacing)
-        match = re.search(
-            r"-\s*\*\*\[([^\]]+)\]\(([^)]+)\)\*\*\s*-\s*(.+)", clean_line
-        )
-        if match:
-            name = match.group(1)
-            url = match.group(2)
-            description = match.group(3)
-
-            # Handle relative URLs by making them absolute GitHub URLs
-            if url.startswith("src/"):
-                url = f"https://github.com/modelcontextprotocol/servers/tree/main/{url}"
-
-            return MCPServerEntry(
-                name=name,
-                description=description,
-                url=url,
-                category=category,
-                source="official"
-            )
-        return None
+        return parse_mcp_server_list(content)
 
 
 class PunkpeyeAwesomeSource(ServerSource):
@@ -136,13 +143,6 @@ class PunkpeyeAwesomeSource(ServerSource):
             url="https://raw.githubusercontent.com/punkpeye/awesome-mcp-servers/main/README.md"
         )
     
-    async def fetch(self) -> str:
-        """Fetch the punkpeye awesome servers README."""
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(self.url)
-            response.raise_for_status()
-            return response.text
-    
     def parse(self, content: str) -> list[MCPServerEntry]:
         """Parse the punkpeye awesome servers format."""
         servers = []
@@ -153,12 +153,12 @@ class PunkpeyeAwesomeSource(ServerSource):
             line = line.strip()
             
             # Detect category headers (format: ## 🔗 Category Name)
-            category_match = re.match(r"^##\s*[\w\s]*?\s*(.+?)(?:\s*\(.*\))?$", line)
+            category_match = _PUNKPEYE_CATEGORY_RE.match(line)
             if category_match and not line.startswith("### "):
                 # Extract category name, clean up emoji and extra text
                 category_text = category_match.group(1)
                 # Remove emojis and normalize category name
-                current_category = re.sub(r"[^\w\s-]", "", category_text).strip().lower().replace(" ", "-")
+                current_category = _CATEGORY_STRIP_RE.sub("", category_text).strip().lower().replace(" ", "-")
                 continue
             
             # Parse server entries
@@ -178,7 +178,7 @@ class PunkpeyeAwesomeSource(ServerSource):
         content = line[2:].strip()
         
         # Extract GitHub URL and name
-        url_match = re.search(r"\[([^\]]+)\]\((https://github\.com/[^)]+)\)", content)
+        url_match = _GITHUB_LINK_RE.search(content)
         if not url_match:
             return None
         
@@ -196,7 +196,7 @@ class PunkpeyeAwesomeSource(ServerSource):
             description_part = description_part[2:].strip()
         
         # Clean up description (remove emoji, normalize whitespace)
-        description = re.sub(r"[^\w\s.,!?()-]", "", description_part).strip()
+        description = _DESCRIPTION_STRIP_RE.sub("", description_part).strip()
         if not description:
             description = f"MCP server for {category}"
         
@@ -218,13 +218,6 @@ class AppcypherAwesomeSource(ServerSource):
             url="https://raw.githubusercontent.com/appcypher/awesome-mcp-servers/main/README.md"
         )
     
-    async def fetch(self) -> str:
-        """Fetch the appcypher awesome servers README."""
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(self.url)
-            response.raise_for_status()
-            return response.text
-    
     def parse(self, content: str) -> list[MCPServerEntry]:
         """Parse the appcypher awesome servers format."""
         servers = []
@@ -239,7 +232,7 @@ class AppcypherAwesomeSource(ServerSource):
                 # Extract category name
                 category_text = line[3:].strip()
                 # Clean up and normalize category name
-                current_category = re.sub(r"[^\w\s-]", "", category_text).strip().lower().replace(" ", "-")
+                current_category = _CATEGORY_STRIP_RE.sub("", category_text).strip().lower().replace(" ", "-")
                 continue
             
             # Parse server entries  
@@ -256,10 +249,10 @@ class AppcypherAwesomeSource(ServerSource):
         
         # Remove leading "- " and any img tags
         content = line[2:].strip()
-        content = re.sub(r"<img[^>]*?>", "", content).strip()
+        content = _IMG_RE.sub("", content).strip()
         
         # Extract GitHub URL and name
-        url_match = re.search(r"\[([^\]]+)\]\((https://github\.com/[^)]+)\)", content)
+        url_match = _GITHUB_LINK_RE.search(content)
         if not url_match:
             return None
         
@@ -1,4 +1,9 @@
-from .database import MCPServerEntry, parse_mcp_server_list
+from unittest.mock import Mock, patch
+
+import numpy as np
+
+from .database import MCPDatabase, MCPServerEntry, parse_mcp_server_list, write_bytes_atomic
+from .semantic_search import SemanticSearchEngine
 
 mcp_server_list = """
 # Model Context Protocol servers
@@ -140,3 +145,128 @@ def test_parse_mcp_server_list_categories():
     expected_categories = {"reference", "archived", "official", "community"}
 
     assert categories == expected_categories
+
+
+def _categorised_database() -> MCPDatabase:
+    return MCPDatabase(servers=[
+        MCPServerEntry("Playwright", "Browser automation", "https://github.com/a/playwright", "browser-automation"),
+        MCPServerEntry("Puppeteer", "Headless Chrome", "https://github.com/a/puppeteer", "browser-automation"),
+        MCPServerEntry("Postgres", "Query PostgreSQL", "https://github.com/a/postgres", "databases"),
+        MCPServerEntry("Fetch", "Web content fetching", "https://github.com/a/fetch", "reference"),
+    ])
+
+
+def test_category_rows_are_prebinned():
+    db = _categorised_database()
+
+    assert db._category_rows["browser-automation"].tolist() == [0, 1]
+    assert db._category_rows["databases"].tolist() == [2]
+    assert db._category_rows["reference"].tolist() == [3]
+
+
+def test_guess_category_requires_all_category_tokens():
+    db = _categorised_database()
+
+    assert db._guess_category({"browser", "automation", "tool"}) == "browser-automation"
+    assert db._guess_category({"databases"}) == "databases"
+    assert db._guess_category({"browser", "testing"}) is None
+
+
+def test_guess_category_ignores_source_tiers():
+    db = _categorised_database()
+
+    assert db._guess_category({"reference", "server"}) is None
+
+
+def _semantic_database(query_embedding, server_embeddings) -> MCPDatabase:
+    """Database whose semantic engine scores against fixed embeddings instead of a model."""
+    db = _categorised_database()
+    engine = SemanticSearchEngine()
+    engine.servers = db.servers
+    engine.server_embeddings = np.array(server_embeddings, dtype=np.float32)
+    engine.model = Mock()
+    engine.model.encode.return_value = np.array([query_embedding], dtype=np.float32)
+    db.semantic_engine = engine
+    return db
+
+
+def test_guessed_category_still_ranks_tier_servers():
+    # Fetch (reference) is closest to the query
+    db = _semantic_database(
+        [1.0, 0.0], [[0.8, 0.6], [0.6, 0.8], [0.9, 0.1], [1.0, 0.0]]
+    )
+
+    assert [s.name for s in db.search("browser automation")] == [
+        "Fetch", "Postgres", "Playwright", "Puppeteer"
+    ]
+
+
+def test_guessed_category_does_not_hide_better_matches():
+    # "databases" names Postgres' category, but Playwright matches best
+    db = _semantic_database(
+        [1.0, 0.0], [[1.0, 0.0], [0.0, 1.0], [0.6, 0.8], [0.0, 1.0]]
+    )
+
+    assert [s.name for s in db.search("databases for browser testing")] == ["Playwright", "Postgres"]
+
+
+def test_guessed_category_breaks_ties():
+    # Playwright and Postgres score the same; the named category goes first
+    db = _semantic_database(
+        [1.0, 0.0], [[0.6, 0.8], [0.0, 1.0], [0.6, 0.8], [0.0, 1.0]]
+    )
+
+    assert [s.name for s in db.search("browser automation")] == ["Playwright", "Postgres"]
+    assert [s.name for s in db.search("databases")] == ["Postgres", "Playwright"]
+
+
+def test_keyword_search_ranks_by_relevance():
+    db = _categorised_database()
+
+    assert [s.name for s in db.search("postgres")] == ["Postgres"]
+    assert [s.name for s in db.search("browser")] == ["Playwright"]
+    assert db.search("nothing matches this") == []
+
+
+def test_keyword_search_respects_limit():
+    db = _categorised_database()
+
+    assert [s.name for s in db.search("chrome postgres")] == ["Postgres", "Puppeteer"]
+    assert [s.name for s in db.search("chrome postgres", limit=1)] == ["Postgres"]
+
+
+def test_write_bytes_atomic_replaces_without_leftovers(tmp_path):
+    path = tmp_path / "server_list.json"
+    path.write_bytes(b"old")
+
+    write_bytes_atomic(path, b"new")
+
+    assert path.read_bytes() == b"new"
+    assert [p.name for p in tmp_path.iterdir()] == ["server_list.json"]
+
+
+def test_search_reuses_results_until_indexes_rebuild():
+    db = _categorised_database()
+
+    with patch.object(db, "_keyword_search", wraps=db._keyword_search) as keyword_search:
+        first = db.search("postgres")
+        first.clear()
+        assert [s.name for s in db.search("postgres")] == ["Postgres"]
+        assert keyword_search.call_count == 1
+
+        db._build_indexes()
+        db.search("postgres")
+        assert keyword_search.call_count == 2
+
+
+def test_search_does_not_cache_keyword_fallback():
+    db = _semantic_database(
+        [1.0, 0.0], [[0.8, 0.6], [0.6, 0.8], [0.9, 0.1], [1.0, 0.0]]
+    )
+
+    with patch.object(
+        db.semantic_engine, "semantic_search",
+        side_effect=[RuntimeError("model crashed"), [(db.servers[3], 1.0)]],
+    ):
+        assert [s.name for s in db.search("postgres")] == ["Postgres"]
+        assert [s.name for s in db.search("postgres")] == ["Fetch"]
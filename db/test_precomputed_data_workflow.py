@@ -462,6 +462,23 @@ async def test_end_to_end_user_experience():
                     # This is correct behavior - no need to cache precomputed data
                     
                     
+def test_quantized_embeddings_roundtrip(tmp_path):
+    """Test that int8 embeddings.npz files keep cosine similarity and legacy files still load."""
+    from .semantic_search import embeddings_from_npz, normalize_embeddings, quantize_embeddings
+    
+    embeddings = np.random.rand(10, 384).astype(np.float32) - 0.5
+    values, scales = quantize_embeddings(embeddings)
+    assert values.dtype == np.int8
+    
+    np.savez_compressed(tmp_path / "quantized.npz", embeddings=values, scales=scales)
+    restored = embeddings_from_npz(np.load(tmp_path / "quantized.npz"))
+    cosine = (normalize_embeddings(restored) * normalize_embeddings(embeddings)).sum(axis=1)
+    assert np.all(cosine > 0.999)
+    
+    np.savez_compressed(tmp_path / "legacy.npz", embeddings=embeddings)
+    assert np.array_equal(embeddings_from_npz(np.load(tmp_path / "legacy.npz")), embeddings)
+
+
 @pytest.mark.asyncio
 async def test_cache_creation_from_live_sources():
     """Test cache creation when precomputed data fails but live sources work."""
@@ -520,6 +537,7 @@ async def test_cache_creation_from_live_sources():
 
 
 @pytest.mark.asyncio
+@pytest.mark.network
 @pytest.mark.skipif(
     not os.environ.get("MCP_MCP_TEST_GITHUB_INTEGRATION"),
     reason="GitHub integration test disabled. Set MCP_MCP_TEST_GITHUB_INTEGRATION=1 to enable"
@@ -581,6 +599,7 @@ async def test_real_github_download():
 
 
 @pytest.mark.asyncio
+@pytest.mark.network
 @pytest.mark.skipif(
     not os.environ.get("MCP_MCP_TEST_GITHUB_INTEGRATION"),
     reason="GitHub integration test disabled. Set MCP_MCP_TEST_GITHUB_INTEGRATION=1 to enable"
@@ -632,6 +651,7 @@ async def test_real_github_redirect_handling():
 
 
 @pytest.mark.asyncio
+@pytest.mark.network
 @pytest.mark.skipif(
     not os.environ.get("MCP_MCP_TEST_GITHUB_STRESS"),
     reason="GitHub stress test disabled. Set MCP_MCP_TEST_GITHUB_STRESS=1 to enable"
@@ -4,10 +4,13 @@ Test suite for multi-source MCP server discovery.
 Tests the new ServerSource implementations and deduplication logic.
 """
 
+import orjson
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
 
-from .sources import OfficialMCPSource, PunkpeyeAwesomeSource, AppcypherAwesomeSource, get_all_sources
+from .sources import (
+    SOURCE_CACHE_VERSION, OfficialMCPSource, PunkpeyeAwesomeSource, AppcypherAwesomeSource, get_all_sources
+)
 from .database import MCPServerEntry, deduplicate_servers
 
 
@@ -141,6 +144,73 @@ class TestAppcypherAwesomeSource:
         assert slack_server.category == "communication"
 
 
+class TestSourceCache:
+    """Test conditional-GET revalidation of the per-source server cache."""
+
+    @staticmethod
+    def _mock_client(mock_client_class, response):
+        mock_client = AsyncMock()
+        mock_client.get.return_value = response
+        mock_client_class.return_value.__aenter__.return_value = mock_client
+        return mock_client
+
+    @pytest.mark.asyncio
+    async def test_get_servers_caches_parse_with_validators(self, tmp_path):
+        """Test that a fresh download is parsed and cached with its validators."""
+        source = OfficialMCPSource()
+        response = MagicMock(status_code=200, text="## 🌟 Reference Servers\n- **[Fetch](src/fetch)** - Fetch pages\n")
+        response.headers = {"etag": '"v1"', "last-modified": "Wed, 01 Oct 2025 00:00:00 GMT"}
+
+        with patch('db.sources.get_server_cache_dir', return_value=tmp_path), \
+             patch('httpx.AsyncClient') as mock_client_class:
+            mock_client = self._mock_client(mock_client_class, response)
+            servers = await source.get_servers()
+            validators, cached = source._load_cache()
+
+        assert [s.name for s in servers] == ["Fetch"]
+        mock_client.get.assert_awaited_once_with(source.url, headers=None)
+        assert validators == {"If-None-Match": '"v1"', "If-Modified-Since": "Wed, 01 Oct 2025 00:00:00 GMT"}
+        assert cached == servers
+
+    @pytest.mark.asyncio
+    async def test_get_servers_reuses_cache_on_not_modified(self, tmp_path):
+        """Test that a 304 answer returns the cached servers without parsing."""
+        source = OfficialMCPSource()
+        cached = [MCPServerEntry("Fetch", "Fetch pages", "https://github.com/example/fetch", "reference", "official")]
+        response = MagicMock(status_code=304)
+
+        with patch('db.sources.get_server_cache_dir', return_value=tmp_path), \
+             patch('httpx.AsyncClient') as mock_client_class, \
+             patch.object(source, 'parse') as mock_parse:
+            source._save_cache({"If-None-Match": '"v1"'}, cached)
+            mock_client = self._mock_client(mock_client_class, response)
+            servers = await source.get_servers()
+
+        assert servers == cached
+        mock_client.get.assert_awaited_once_with(source.url, headers={"If-None-Match": '"v1"'})
+        mock_parse.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_get_servers_refetches_outdated_cache(self, tmp_path):
+        """Test that a cache written by an older parser is ignored, not revalidated."""
+        source = OfficialMCPSource()
+        response = MagicMock(status_code=200, text="## 🌟 Reference Servers\n- **[Fetch](src/fetch)** - Fetch pages\n")
+        response.headers = {"etag": '"v2"'}
+
+        with patch('db.sources.get_server_cache_dir', return_value=tmp_path), \
+             patch('httpx.AsyncClient') as mock_client_class:
+            source.cache_path.write_bytes(orjson.dumps({
+                "version": SOURCE_CACHE_VERSION - 1,
+                "validators": {"If-None-Match": '"v1"'},
+                "servers": [],
+            }))
+            mock_client = self._mock_client(mock_client_class, response)
+            servers = await source.get_servers()
+
+        assert [s.name for s in servers] == ["Fetch"]
+        mock_client.get.assert_awaited_once_with(source.url, headers=None)
+
+
 class TestDeduplication:
     """Test server deduplication logic."""
     
@@ -1,16 +1,19 @@
+import asyncio
+import codecs
+import re
 import sys
+import time
+from collections import OrderedDict
 from contextlib import asynccontextmanager
 from dataclasses import dataclass
 from typing import AsyncGenerator
+from urllib.parse import urlsplit
 
 import httpx
 from mcp.server.fastmcp import Context, FastMCP
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
-from starlette.exceptions import HTTPException
 
 from db import MCPDatabase
+from middleware import OriginValidationMiddleware
 from settings import app_logger
 
 logger = app_logger.getChild(__name__)
@@ -18,15 +21,46 @@ logger = app_logger.getChild(__name__)
 # Global database instance
 _global_mcp_db: MCPDatabase | None = None
 
-
-@dataclass
+# Shared HTTP client so README fetches reuse pooled keep-alive connections;
+# the server lifespan closes it on shutdown
+_http_client: httpx.AsyncClient | None = None
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Get the shared HTTP client, creating it on first use."""
+    global _http_client
+    if _http_client is None:
+        # HTTP/2 multiplexes the concurrent README probes over one connection per host
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(10.0, pool=5.0),
+            limits=httpx.Limits(
+                max_connections=50, max_keepalive_connections=20, keepalive_expiry=60.0
+            ),
+        )
+    return _http_client
+
+
+# README cache: server URL -> (readme URL, text, ETag, fetched at), least recently used first
+README_CACHE_TTL = 3600.0
+README_CACHE_SIZE = 256
+# Cap on README bytes downloaded per server; the tail rarely matters to the caller
+README_MAX_BYTES = 64 * 1024
+_readme_cache: OrderedDict[str, tuple[str, str, str | None, float]] = OrderedDict()
+# GitHub URL path: /owner/repo or /owner/repo/tree/branch[/path]
+_GITHUB_PATH_RE = re.compile(
+    r"^/(?P<owner>[^/]+)/(?P<repo>[^/]+)(?:/tree/(?P<branch>[^/]+)(?:/(?P<path>.+?))?)?/?$"
+)
+
+
+@dataclass(slots=True, frozen=True)
 class AppContext:
     mcp_db: MCPDatabase
 
 
 @asynccontextmanager
 async def app_lifespan(_: FastMCP) -> AsyncGenerator[AppContext]:
-    global _global_mcp_db
+    global _global_mcp_db, _http_client
     logger.info("Loading MCP database...")
     mcp_db = await MCPDatabase.create()
     _global_mcp_db = mcp_db  # Store globally for tool access
@@ -34,103 +68,109 @@ async def app_lifespan(_: FastMCP) -> AsyncGenerator[AppContext]:
     try:
         yield AppContext(mcp_db=mcp_db)
     finally:
-        pass
+        # Tools use the module-level client, so that is the one to close
+        if _http_client is not None:
+            await _http_client.aclose()
+            _http_client = None
 
 
-class OriginValidationMiddleware(BaseHTTPMiddleware):
-    """Middleware to validate Origin headers and prevent DNS rebinding attacks."""
-    
-    def __init__(self, app, allowed_hosts: list[str]):
-        super().__init__(app)
-        self.allowed_origins = set()
-        
-        # Generate allowed origins for both http and https
-        for host in allowed_hosts:
-            if host in ("localhost", "127.0.0.1"):
-                # Add common ports for localhost
-                for port in [8000, 8080, 3000, 5000]:
-                    self.allowed_origins.add(f"http://{host}:{port}")
-                    self.allowed_origins.add(f"https://{host}:{port}")
-                # Also allow without port for default
-                self.allowed_origins.add(f"http://{host}")
-                self.allowed_origins.add(f"https://{host}")
-            else:
-                self.allowed_origins.add(f"http://{host}")
-                self.allowed_origins.add(f"https://{host}")
-    
-    async def dispatch(self, request: Request, call_next):
-        # Check Origin header if present
-        origin = request.headers.get("origin")
-        if origin is not None:
-            if origin not in self.allowed_origins:
-                logger.warning(f"Rejected request with invalid origin: {origin}")
-                return Response(
-                    content="Forbidden: Invalid origin header",
-                    status_code=403,
-                    headers={"Content-Type": "text/plain"}
-                )
-        
-        # Check Host header as additional protection
-        host = request.headers.get("host")
-        if host is not None:
-            # Extract hostname from host header (remove port if present)
-            hostname = host.split(":")[0]
-            # Allow localhost and 127.0.0.1 for local development
-            if hostname not in ("localhost", "127.0.0.1"):
-                logger.warning(f"Rejected request with invalid host: {host}")
-                return Response(
-                    content="Forbidden: Invalid host header", 
-                    status_code=403,
-                    headers={"Content-Type": "text/plain"}
-                )
-        
-        return await call_next(request)
+mcp = FastMCP("MCP-MCP", lifespan=app_lifespan)
 
 
-mcp = FastMCP("MCP-MCP", lifespan=app_lifespan)
+def _cache_readme(server_url: str, readme_url: str, text: str, etag: str | None) -> None:
+    """Store a fetched README, evicting the least recently used entry when full."""
+    _readme_cache[server_url] = (readme_url, text, etag, time.monotonic())
+    _readme_cache.move_to_end(server_url)
+    if len(_readme_cache) > README_CACHE_SIZE:
+        _readme_cache.popitem(last=False)
+
+
+async def _download_readme(
+    client: httpx.AsyncClient, readme_url: str, headers: dict[str, str] | None = None
+) -> tuple[int, str | None, str | None]:
+    """
+    GET a README, reading at most README_MAX_BYTES of the body.
+
+    Returns (status code, text, ETag); text and ETag are None unless the status is 200.
+    """
+    async with client.stream("GET", readme_url, headers=headers) as response:
+        if response.status_code != 200:
+            return response.status_code, None, None
+        
+        body = bytearray()
+        async for chunk in response.aiter_bytes():
+            body += chunk
+            if len(body) >= README_MAX_BYTES:
+                break
+        
+        truncated = len(body) >= README_MAX_BYTES
+        # A non-final decode drops a multi-byte character cut off by the cap
+        decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+        text = decoder.decode(bytes(body[:README_MAX_BYTES]), final=not truncated)
+        return response.status_code, text, response.headers.get("etag")
 
 
-async def _fetch_readme_content(server_url: str) -> str | None:
+async def _fetch_readme_content(
+    server_url: str, client: httpx.AsyncClient | None = None
+) -> str | None:
     """Fetch README content from a GitHub repository."""
-    if "github.com" not in server_url:
+    cached = _readme_cache.get(server_url)
+    if cached is not None:
+        _readme_cache.move_to_end(server_url)
+        if time.monotonic() - cached[3] < README_CACHE_TTL:
+            return cached[1]
+    
+    # Example: https://github.com/owner/repo/tree/main/path -> owner, repo, main, path
+    parsed = urlsplit(server_url)
+    if parsed.netloc not in ("github.com", "www.github.com"):
+        return None
+    match = _GITHUB_PATH_RE.match(parsed.path)
+    if match is None:
         return None
+    owner, repo = match["owner"], match["repo"]
+    branch = match["branch"] or "main"
+    path = match["path"] or ""
     
     try:
-        # Convert GitHub URL to raw content URL
-        # Example: https://github.com/owner/repo/tree/main/path -> https://raw.githubusercontent.com/owner/repo/main/path/README.md
-        parts = server_url.replace("https://github.com/", "").split("/")
-        if len(parts) < 2:
-            return None
-            
-        owner = parts[0]
-        repo = parts[1]
-        
-        # Handle different URL formats
-        if "/tree/" in server_url:
-            # URL with specific path like: https://github.com/modelcontextprotocol/servers/tree/main/src/fetch
-            tree_part = server_url.split("/tree/")[1]
-            branch_and_path = tree_part.split("/", 1)
-            branch = branch_and_path[0]
-            path = branch_and_path[1] if len(branch_and_path) > 1 else ""
-        else:
-            # Simple repo URL
-            branch = "main"
-            path = ""
-        
-        # Try different README file names
+        if client is None:
+            client = _get_http_client()
+
+        # Revalidate a stale cache entry with a conditional GET
+        if cached is not None and cached[2]:
+            readme_url, text, etag, _ = cached
+            status, new_text, new_etag = await _download_readme(
+                client, readme_url, headers={"If-None-Match": etag}
+            )
+            if status == 304:
+                _cache_readme(server_url, readme_url, text, etag)
+                return text
+            if status == 200:
+                _cache_readme(server_url, readme_url, new_text, new_etag)
+                return new_text
+
+        # Try different README file names concurrently, preferring earlier names
         readme_names = ["README.md", "README.txt", "README", "readme.md", "readme.txt", "readme"]
+        if path:
+            base_url = f"https://raw.githubusercontent.com/{owner}/{repo}/{branch}/{path}"
+        else:
+            base_url = f"https://raw.githubusercontent.com/{owner}/{repo}/{branch}"
         
-        for readme_name in readme_names:
-            if path:
-                readme_url = f"https://raw.githubusercontent.com/{owner}/{repo}/{branch}/{path}/{readme_name}"
-            else:
-                readme_url = f"https://raw.githubusercontent.com/{owner}/{repo}/{branch}/{readme_name}"
-            
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(readme_url)
-                if response.status_code == 200:
+        # HEAD the candidates first so only the winning README body is downloaded
+        responses = await asyncio.gather(
+            *(client.head(f"{base_url}/{readme_name}") for readme_name in readme_names),
+            return_exceptions=True,
+        )
+        for readme_name, response in zip(readme_names, responses):
+            if isinstance(response, BaseException):
+                logger.debug(f"Failed to probe {readme_name} for {server_url}: {response}")
+                continue
+            if response.status_code == 200:
+                readme_url = f"{base_url}/{readme_name}"
+                status, text, etag = await _download_readme(client, readme_url)
+                if status == 200:
                     logger.info(f"Found README: {readme_name}")
-                    return response.text
+                    _cache_readme(server_url, readme_url, text, etag)
+                    return text
         
         logger.info(f"No README found for {server_url}")
         return None
@@ -222,7 +262,8 @@ async def find_mcp_tool(
     search_query = description
 
     # Search for relevant servers
-    results = mcp_db.search(search_query)
+    # Only the top few results are considered for the response
+    results = mcp_db.search(search_query, limit=4)
 
     if not results:
         return {
@@ -231,79 +272,34 @@ async def find_mcp_tool(
             "suggestions": "Try a different search term or check the available server categories",
         }
 
-    # Find the best server with README content
-    primary_server = None
-    primary_readme = None
-    alternatives = []
-
-    # Try to fetch README for top results until we find one with documentation
-    for i, server in enumerate(results[:4]):  # Check top 4 results
-        readme_content = await _fetch_readme_content(server.url)
-        
-        if primary_server is None:
-            # First server becomes primary regardless of README
-            primary_server = server
-            primary_readme = readme_content
-            
-            # If first server has README, we're done with primary selection
-            if readme_content:
-                # Add remaining servers as alternatives without README
-                for alt_server in results[1:4]:
-                    alternatives.append({
-                        "name": alt_server.name,
-                        "description": alt_server.description,
-                        "url": alt_server.url,
-                        "category": alt_server.category,
-                        "source": alt_server.source,
-                        "readme": None,
-                    })
-                break
-        else:
-            # Add to alternatives
-            alternatives.append({
-                "name": server.name,
-                "description": server.description,
-                "url": server.url,
-                "category": server.category,
-                "source": server.source,
-                "readme": None,
-            })
-            
-            # If primary doesn't have README but this one does, promote it to primary
-            if primary_readme is None and readme_content:
-                # Demote current primary to alternatives
-                alternatives.insert(0, {
-                    "name": primary_server.name,
-                    "description": primary_server.description,
-                    "url": primary_server.url,
-                    "category": primary_server.category,
-                    "source": primary_server.source,
-                    "readme": None,
-                })
-                
-                # Promote this server to primary
-                primary_server = server
-                primary_readme = readme_content
-                
-                # Remove the newly promoted server from alternatives
-                alternatives.pop()
-                break
-
-    # Fill alternatives up to 3 if we don't have enough
-    if len(alternatives) < 3:
-        start_idx = 1 if primary_server == results[0] else 2
-        for alt_server in results[start_idx:4]:
-            if len(alternatives) >= 3:
+    # Fetch the top result's README; only probe the runners-up concurrently if it has none
+    candidates = results[:4]
+    primary_index = 0
+    primary_readme = await _fetch_readme_content(candidates[0].url)
+    if not primary_readme and len(candidates) > 1:
+        readmes = await asyncio.gather(
+            *(_fetch_readme_content(server.url) for server in candidates[1:])
+        )
+        # Prefer the highest-ranked server with documentation
+        for i, readme in enumerate(readmes, start=1):
+            if readme:
+                primary_index, primary_readme = i, readme
                 break
-            if alt_server != primary_server:
-                alternatives.append({
-                    "name": alt_server.name,
-                    "description": alt_server.description,
-                    "url": alt_server.url,
-                    "category": alt_server.category,
-                    "source": alt_server.source,
-                    "readme": None,
-                })
+    primary_server = candidates[primary_index]
+
+    # Remaining candidates keep their ranking order as alternatives
+    alternatives = [
+        {
+            "name": alt_server.name,
+            "description": alt_server.description,
+            "url": alt_server.url,
+            "category": alt_server.category,
+            "source": alt_server.source,
+            "readme": None,
+        }
+        for i, alt_server in enumerate(candidates)
+        if i != primary_index
+    ]
 
     response = {
         "status": "found",
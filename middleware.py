@@ -0,0 +1,94 @@
+"""ASGI middleware guarding the HTTP transport against DNS rebinding."""
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from settings import app_logger
+
+logger = app_logger.getChild(__name__)
+
+
+def _forbidden(message: bytes) -> tuple[dict, dict]:
+    """Build the ASGI messages for a plain-text 403 response."""
+    return (
+        {
+            "type": "http.response.start",
+            "status": 403,
+            "headers": [
+                (b"content-type", b"text/plain"),
+                (b"content-length", str(len(message)).encode()),
+            ],
+        },
+        {"type": "http.response.body", "body": message},
+    )
+
+
+class OriginValidationMiddleware:
+    """Middleware to validate Origin headers and prevent DNS rebinding attacks."""
+    
+    __slots__ = ("app", "allowed_hostnames", "allowed_origins")
+    
+    _INVALID_ORIGIN = _forbidden(b"Forbidden: Invalid origin header")
+    _INVALID_HOST = _forbidden(b"Forbidden: Invalid host header")
+    
+    def __init__(self, app: ASGIApp, allowed_hosts: list[str]):
+        self.app = app
+        # Hostnames accepted in the Host header, matched case-insensitively once the port is stripped
+        self.allowed_hostnames: frozenset[bytes] = frozenset(
+            host.lower().encode() for host in allowed_hosts
+        )
+        allowed_origins: set[bytes] = set()
+        
+        # Generate allowed origins for both http and https
+        for host in allowed_hosts:
+            if host in ("localhost", "127.0.0.1"):
+                # Add common ports for localhost
+                for port in [8000, 8080, 3000, 5000]:
+                    allowed_origins.add(f"http://{host}:{port}".encode())
+                    allowed_origins.add(f"https://{host}:{port}".encode())
+                # Also allow without port for default
+                allowed_origins.add(f"http://{host}".encode())
+                allowed_origins.add(f"https://{host}".encode())
+            else:
+                allowed_origins.add(f"http://{host}".encode())
+                allowed_origins.add(f"https://{host}".encode())
+        self.allowed_origins: frozenset[bytes] = frozenset(allowed_origins)
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        # ASGI header names are already lowercased bytes; stop once both are seen
+        origin = host = None
+        for name, value in scope["headers"]:
+            if name == b"host":
+                host = value
+                if origin is not None:
+                    break
+            elif name == b"origin":
+                origin = value
+                if host is not None:
+                    break
+        
+        # Check Origin header if present
+        if origin is not None and origin not in self.allowed_origins:
+            logger.warning(f"Rejected request with invalid origin: {origin.decode('latin-1')}")
+            await self._reject(send, self._INVALID_ORIGIN)
+            return
+        
+        # Check Host header as additional protection
+        if host is not None:
+            # Extract hostname from host header (remove port if present)
+            hostname = host.partition(b":")[0].lower()
+            if hostname not in self.allowed_hostnames:
+                logger.warning(f"Rejected request with invalid host: {host.decode('latin-1')}")
+                await self._reject(send, self._INVALID_HOST)
+                return
+        
+        await self.app(scope, receive, send)
+    
+    @staticmethod
+    async def _reject(send: Send, messages: tuple[dict, dict]) -> None:
+        start, body = messages
+        await send(start)
+        await send(body)
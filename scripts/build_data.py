@@ -10,23 +10,31 @@ Supports incremental embedding computation to reduce compute costs.
 
 import asyncio
 import hashlib
-import json
+import io
 import os
 import sys
 import time
-from dataclasses import asdict
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
 import httpx
 import numpy as np
+import orjson
 
 # Add the parent directory to the path so we can import from the project
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from db.database import MCPServerEntry, deduplicate_servers
+from db.database import MCPServerEntry, deduplicate_servers, write_bytes_atomic
 from db.sources import get_all_sources
-from db.semantic_search import SemanticSearchEngine, DEFAULT_MODEL, EMBEDDINGS_VERSION
+from db.semantic_search import (
+    SemanticSearchEngine,
+    DEFAULT_MODEL,
+    EMBEDDINGS_VERSION,
+    ENCODE_BATCH_SIZE,
+    embeddings_from_npz,
+    quantize_embeddings,
+)
 from db.schema_versions import CURRENT_SCHEMA_VERSION
 from settings import app_logger
 
@@ -43,18 +51,22 @@ PREVIOUS_SERVERS_URL = f"{GITHUB_RELEASE_BASE}/servers.json"
 PREVIOUS_EMBEDDINGS_URL = f"{GITHUB_RELEASE_BASE}/embeddings.npz"
 PREVIOUS_DATA_INFO_URL = f"{GITHUB_RELEASE_BASE}/data_info.json"
 
+# Increment when compute_server_hash() changes its input format (2: unit-separated fields)
+SERVER_HASH_VERSION = 2
 
+
+@lru_cache(maxsize=None)
 def compute_server_hash(server: MCPServerEntry) -> str:
-    """Compute a hash for a server entry to detect changes."""
-    content = {
-        "name": server.name,
-        "description": server.description,
-        "url": server.url,
-        "category": server.category,
-        # Don't include source in hash since that's metadata, not content
-    }
-    content_str = json.dumps(content, sort_keys=True)
-    return hashlib.sha256(content_str.encode()).hexdigest()[:16]
+    """
+    Compute a hash for a server entry to detect changes.
+    
+    Memoized, since a build hashes every server several times: for the overall
+    hash, in find_changed_servers() and again when reusing embeddings.
+    """
+    # Don't include source in hash since that's metadata, not content
+    content = "\x1f".join((server.name, server.description, server.url, server.category))
+    # First 8 bytes of the digest, the same value as hexdigest()[:16]
+    return hashlib.sha256(content.encode()).digest()[:8].hex()
 
 
 def compute_servers_hash(servers: list[MCPServerEntry]) -> str:
@@ -62,7 +74,7 @@ def compute_servers_hash(servers: list[MCPServerEntry]) -> str:
     server_hashes = [compute_server_hash(server) for server in servers]
     server_hashes.sort()  # Ensure consistent ordering
     combined = "|".join(server_hashes)
-    return hashlib.sha256(combined.encode()).hexdigest()[:16]
+    return hashlib.sha256(combined.encode()).digest()[:8].hex()
 
 
 async def fetch_all_servers() -> list[MCPServerEntry]:
@@ -92,51 +104,51 @@ async def download_previous_data() -> tuple[Optional[list[MCPServerEntry]], Opti
     """Download previous release data for incremental processing."""
     logger.info("Downloading previous release data for incremental processing...")
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        previous_servers = None
-        previous_embeddings = None
-        previous_data_info = None
-        
-        # Download previous servers
+    async def fetch_servers(client: httpx.AsyncClient) -> Optional[list[MCPServerEntry]]:
         try:
             response = await client.get(PREVIOUS_SERVERS_URL)
             if response.status_code == 200:
                 servers_data = response.json()
                 previous_servers = [MCPServerEntry(**server) for server in servers_data]
                 logger.info(f"Downloaded {len(previous_servers)} servers from previous release")
-            else:
-                logger.info(f"No previous servers found (HTTP {response.status_code})")
+                return previous_servers
+            logger.info(f"No previous servers found (HTTP {response.status_code})")
         except Exception as e:
             logger.info(f"Could not download previous servers: {e}")
-        
-        # Download previous embeddings
+        return None
+    
+    async def fetch_embeddings(client: httpx.AsyncClient) -> Optional[np.ndarray]:
         try:
             response = await client.get(PREVIOUS_EMBEDDINGS_URL)
             if response.status_code == 200:
-                # Save to temporary file and load with numpy
-                temp_embeddings = DIST_DIR / "temp_embeddings.npz"
-                temp_embeddings.write_bytes(response.content)
-                embeddings_data = np.load(temp_embeddings)
-                previous_embeddings = embeddings_data['embeddings']
-                temp_embeddings.unlink()  # Clean up
+                # Decompress in a worker thread so the other downloads keep going
+                previous_embeddings = await asyncio.to_thread(
+                    lambda: embeddings_from_npz(np.load(io.BytesIO(response.content)))
+                )
                 logger.info(f"Downloaded embeddings matrix: {previous_embeddings.shape}")
-            else:
-                logger.info(f"No previous embeddings found (HTTP {response.status_code})")
+                return previous_embeddings
+            logger.info(f"No previous embeddings found (HTTP {response.status_code})")
         except Exception as e:
             logger.info(f"Could not download previous embeddings: {e}")
-        
-        # Download previous data info
+        return None
+    
+    async def fetch_data_info(client: httpx.AsyncClient) -> Optional[dict]:
         try:
             response = await client.get(PREVIOUS_DATA_INFO_URL)
             if response.status_code == 200:
-                previous_data_info = response.json()
                 logger.info("Downloaded previous data info")
-            else:
-                logger.info(f"No previous data info found (HTTP {response.status_code})")
+                return response.json()
+            logger.info(f"No previous data info found (HTTP {response.status_code})")
         except Exception as e:
             logger.info(f"Could not download previous data info: {e}")
-        
-        return previous_servers, previous_embeddings, previous_data_info
+        return None
+    
+    # The three release assets download concurrently over one HTTP/2 connection
+    async with httpx.AsyncClient(http2=True, timeout=30.0, follow_redirects=True) as client:
+        previous_servers, previous_embeddings, previous_data_info = await asyncio.gather(
+            fetch_servers(client), fetch_embeddings(client), fetch_data_info(client)
+        )
+    return previous_servers, previous_embeddings, previous_data_info
 
 
 def find_changed_servers(
@@ -154,31 +166,27 @@ def find_changed_servers(
         # No previous data, all servers are new
         return list(range(len(current_servers))), {}
     
-    # Create mapping from hash to index for previous servers
-    previous_hash_to_index = {}
-    previous_hashes = set()
-    for i, server in enumerate(previous_servers):
-        server_hash = compute_server_hash(server)
-        previous_hash_to_index[server_hash] = i
-        previous_hashes.add(server_hash)
-    
-    # Create mapping for current servers
-    current_hashes = set()
-    changed_indices = []
-    for i, server in enumerate(current_servers):
-        server_hash = compute_server_hash(server)
-        current_hashes.add(server_hash)
-        if server_hash not in previous_hash_to_index:
-            changed_indices.append(i)
+    previous_hashes = np.fromiter(
+        (compute_server_hash(server) for server in previous_servers), dtype="U16", count=len(previous_servers)
+    )
+    current_hashes = np.fromiter(
+        (compute_server_hash(server) for server in current_servers), dtype="U16", count=len(current_servers)
+    )
+    
+    # Mapping from hash to index in previous embeddings (last occurrence wins)
+    previous_hash_to_index = {server_hash: i for i, server_hash in enumerate(previous_hashes.tolist())}
+    
+    # Current servers whose hash is not in the previous release
+    changed_indices = np.flatnonzero(~np.isin(current_hashes, previous_hashes)).tolist()
     
     # Track removed and added servers for monitoring
-    removed_servers = previous_hashes - current_hashes
-    added_servers = current_hashes - previous_hashes
+    removed_servers = np.setdiff1d(previous_hashes, current_hashes)
+    added_servers = np.setdiff1d(current_hashes, previous_hashes)
     
     logger.info(f"Server changes: {len(added_servers)} added, {len(removed_servers)} removed, {len(changed_indices)} total changed/new")
-    if removed_servers:
+    if len(removed_servers):
         logger.info(f"Removed {len(removed_servers)} servers (embeddings will be discarded)")
-    if added_servers:
+    if len(added_servers):
         logger.info(f"Added {len(added_servers)} new servers (embeddings will be generated)")
     
     return changed_indices, previous_hash_to_index
@@ -192,10 +200,25 @@ async def generate_embeddings_incremental(
     """Generate embeddings incrementally, reusing unchanged ones."""
     
     changed_indices, previous_hash_to_index = find_changed_servers(servers, previous_servers)
+    num_servers = len(servers)
     
-    if not changed_indices and previous_embeddings is not None:
+    # Rows of unchanged servers in the previous embeddings
+    reuse_dst = []
+    reuse_src = []
+    if previous_embeddings is not None:
+        previous_embeddings = np.ascontiguousarray(previous_embeddings, dtype=np.float32)
+        changed = set(changed_indices)
+        for i, server in enumerate(servers):
+            if i not in changed:
+                prev_index = previous_hash_to_index.get(compute_server_hash(server))
+                if prev_index is not None and prev_index < len(previous_embeddings):
+                    reuse_dst.append(i)
+                    reuse_src.append(prev_index)
+    
+    if not changed_indices and len(reuse_dst) == num_servers:
         logger.info("No servers changed, reusing all previous embeddings")
-        return previous_embeddings
+        # Gathered by index, so reordered or removed servers still line up
+        return previous_embeddings[reuse_src]
     
     # Initialize semantic search engine
     logger.info(f"Loading sentence transformer model: {DEFAULT_MODEL}")
@@ -203,29 +226,25 @@ async def generate_embeddings_incremental(
     # Load model directly without initializing with servers
     from sentence_transformers import SentenceTransformer
     search_engine.model = SentenceTransformer(DEFAULT_MODEL)
+    if search_engine.model.device.type == "cuda":
+        # Half precision doubles encode throughput on GPU; embeddings are saved as float anyway
+        search_engine.model.half()
     
     # Prepare final embeddings array
-    num_servers = len(servers)
     if previous_embeddings is not None:
         embedding_dim = previous_embeddings.shape[1]
     else:
         # Generate one embedding to get dimensions
         sample_text = search_engine._get_server_texts([servers[0]])[0]
-        sample_embedding = search_engine.model.encode([sample_text], convert_to_numpy=True)
+        sample_embedding = search_engine.model.encode([sample_text], convert_to_numpy=True, normalize_embeddings=True)
         embedding_dim = sample_embedding.shape[1]
     
-    final_embeddings = np.zeros((num_servers, embedding_dim))
+    final_embeddings = np.zeros((num_servers, embedding_dim), dtype=np.float32)
     
-    # Copy existing embeddings for unchanged servers
-    reused_count = 0
-    for i, server in enumerate(servers):
-        if i not in changed_indices:
-            server_hash = compute_server_hash(server)
-            if server_hash in previous_hash_to_index:
-                prev_index = previous_hash_to_index[server_hash]
-                if previous_embeddings is not None and prev_index < len(previous_embeddings):
-                    final_embeddings[i] = previous_embeddings[prev_index]
-                    reused_count += 1
+    # Copy existing embeddings for unchanged servers in one gather
+    if reuse_dst:
+        final_embeddings[reuse_dst] = previous_embeddings[reuse_src]
+    reused_count = len(reuse_dst)
     
     logger.info(f"Reused {reused_count} existing embeddings")
     
@@ -237,7 +256,9 @@ async def generate_embeddings_incremental(
         
         new_embeddings = search_engine.model.encode(
             changed_texts,
+            batch_size=ENCODE_BATCH_SIZE,
             convert_to_numpy=True,
+            normalize_embeddings=True,
             show_progress_bar=True if len(changed_texts) > 10 else False
         )
         
@@ -268,9 +289,13 @@ async def build_data() -> dict:
     # Download previous data for incremental processing
     previous_servers, previous_embeddings, previous_data_info = await download_previous_data()
     
-    # Check if data has changed
-    previous_hash = previous_data_info.get("servers_hash") if previous_data_info else None
-    if previous_hash == current_hash:
+    # Check if data has changed; a new hash format or schema always rebuilds
+    previous_data_info = previous_data_info or {}
+    if (
+        previous_data_info.get("servers_hash") == current_hash
+        and previous_data_info.get("hash_version") == SERVER_HASH_VERSION
+        and previous_data_info.get("schema_version") == CURRENT_SCHEMA_VERSION
+    ):
         logger.info("No changes detected, data is up to date")
         return {
             "changed": False,
@@ -285,17 +310,21 @@ async def build_data() -> dict:
     
     # Save servers data
     logger.info(f"Saving {len(current_servers)} servers to {SERVERS_FILE}")
-    with open(SERVERS_FILE, 'w', encoding='utf-8') as f:
-        json.dump([asdict(server) for server in current_servers], f, ensure_ascii=False, indent=2)
+    write_bytes_atomic(SERVERS_FILE, orjson.dumps(current_servers, option=orjson.OPT_INDENT_2))
     
     # Save embeddings
     logger.info(f"Saving embeddings matrix {embeddings.shape} to {EMBEDDINGS_FILE}")
-    np.savez_compressed(EMBEDDINGS_FILE, embeddings=embeddings)
+    # Stored as int8 with per-row scales, a quarter of the float32 size
+    values, scales = quantize_embeddings(embeddings)
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, embeddings=values, scales=scales)
+    write_bytes_atomic(EMBEDDINGS_FILE, buffer.getvalue())
     
     # Create data info
     data_info = {
         "servers_count": len(current_servers),
         "servers_hash": current_hash,
+        "hash_version": SERVER_HASH_VERSION,
         "embeddings_shape": list(embeddings.shape),
         "model_name": DEFAULT_MODEL,
         "embeddings_version": EMBEDDINGS_VERSION,
@@ -307,8 +336,7 @@ async def build_data() -> dict:
     
     # Save data info
     logger.info(f"Saving data info to {DATA_INFO_FILE}")
-    with open(DATA_INFO_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data_info, f, indent=2)
+    write_bytes_atomic(DATA_INFO_FILE, orjson.dumps(data_info, option=orjson.OPT_INDENT_2))
     
     build_time = time.time() - start_time
     logger.info(f"Data build completed in {build_time:.1f}s")
@@ -17,13 +17,15 @@ The script:
 """
 
 import asyncio
-import json
+import os
 import re
 import sys
+import time
 from pathlib import Path
 from typing import Optional
 
 import httpx
+import orjson
 
 # GitHub release URLs
 GITHUB_RELEASE_BASE = "https://github.com/wojtyniak/mcp-mcp/releases/download/data-latest"
@@ -34,6 +36,29 @@ PROJECT_ROOT = Path(__file__).parent.parent
 README_PATH = PROJECT_ROOT / "README.md"
 LOCAL_DATA_INFO = PROJECT_ROOT / "dist" / "data_info.json"
 
+# Downloaded data_info.json is reused for this many seconds (XDG cache, like the server lists)
+CACHE_PATH = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "mcp-mcp" / "data_info.json"
+CACHE_TTL = 600
+VALIDATORS_PATH = CACHE_PATH.with_name("data_info.validators.json")
+
+# Server counts in the title ("1,234+ MCP Servers Available") and text ("1,234+ unique servers").
+# The README is matched as raw UTF-8 bytes; the pattern itself is ASCII.
+SERVER_COUNT_RE = re.compile(
+    rb'(?P<num>\d{1,3}(?:,\d{3})*)\+(?P<tail>\s++(?:MCP\s++Servers\s++Available|(?:unique\s++)?servers))',
+    re.IGNORECASE,
+)
+
+# Shared HTTP client, created on first use and closed by main()
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Get the shared HTTP client, creating it on first use."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(http2=True, timeout=30.0, follow_redirects=True)
+    return _client
+
 
 async def get_current_server_count() -> Optional[int]:
     """
@@ -45,27 +70,62 @@ async def get_current_server_count() -> Optional[int]:
     # Try local data first (for development)
     if LOCAL_DATA_INFO.exists():
         try:
-            with open(LOCAL_DATA_INFO, 'r') as f:
-                data = json.load(f)
-                count = data.get('servers_count')
-                if count:
-                    print(f"Using local server count: {count}")
-                    return int(count)
+            data = orjson.loads(LOCAL_DATA_INFO.read_bytes())
+            count = data.get('servers_count')
+            if count:
+                print(f"Using local server count: {count}")
+                return int(count)
         except Exception as e:
             print(f"Failed to read local data info: {e}")
     
+    # Try a recent download next
+    try:
+        if time.time() - CACHE_PATH.stat().st_mtime < CACHE_TTL:
+            count = orjson.loads(CACHE_PATH.read_bytes()).get('servers_count')
+            if count:
+                print(f"Using cached server count: {count}")
+                return int(count)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Failed to read cached data info: {e}")
+    
+    # Revalidate a stale download instead of fetching it again
+    validators = None
+    if CACHE_PATH.exists():
+        try:
+            validators = orjson.loads(VALIDATORS_PATH.read_bytes())
+        except Exception:
+            validators = None
+    
     # Try downloading from GitHub release
     try:
-        async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-            response = await client.get(DATA_INFO_URL)
-            if response.status_code == 200:
-                data = response.json()
-                count = data.get('servers_count')
-                if count:
-                    print(f"Downloaded server count from GitHub: {count}")
-                    return int(count)
-            else:
-                print(f"Failed to download data info: HTTP {response.status_code}")
+        response = await _get_client().get(DATA_INFO_URL, headers=validators)
+        if response.status_code == 304:
+            count = orjson.loads(CACHE_PATH.read_bytes()).get('servers_count')
+            if count:
+                CACHE_PATH.touch()  # Fresh for another CACHE_TTL
+                print(f"Server count unchanged on GitHub: {count}")
+                return int(count)
+        elif response.status_code == 200:
+            data = orjson.loads(response.content)
+            count = data.get('servers_count')
+            if count:
+                print(f"Downloaded server count from GitHub: {count}")
+                new_validators = {}
+                if etag := response.headers.get("etag"):
+                    new_validators["If-None-Match"] = etag
+                if last_modified := response.headers.get("last-modified"):
+                    new_validators["If-Modified-Since"] = last_modified
+                try:
+                    CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+                    CACHE_PATH.write_bytes(response.content)
+                    VALIDATORS_PATH.write_bytes(orjson.dumps(new_validators))
+                except OSError as e:
+                    print(f"Failed to cache data info: {e}")
+                return int(count)
+        else:
+            print(f"Failed to download data info: HTTP {response.status_code}")
     except Exception as e:
         print(f"Failed to download data info: {e}")
     
@@ -86,20 +146,14 @@ def extract_server_count_from_readme() -> Optional[int]:
         return None
     
     try:
-        content = README_PATH.read_text(encoding='utf-8')
-        
-        # Find all server count patterns including title
-        patterns = [
-            r'(\d{1,3}(?:,\d{3})*)\+\s+MCP\s+Servers\s+Available',  # Title pattern
-            r'(\d{1,3}(?:,\d{3})*)\+\s+(?:unique\s+)?servers',       # General pattern
-        ]
+        content = README_PATH.read_bytes()
         
+        # Find all server count patterns including title; every count is followed by "+"
         all_counts = []
-        for pattern in patterns:
-            matches = re.findall(pattern, content, re.IGNORECASE)
-            for match in matches:
-                count = int(match.replace(',', ''))
-                all_counts.append(count)
+        if b'+' in content:
+            all_counts = [
+                int(match['num'].replace(b',', b'')) for match in SERVER_COUNT_RE.finditer(content)
+            ]
         
         if all_counts:
             min_count = min(all_counts)
@@ -129,25 +183,19 @@ def update_readme_server_count(new_count: int) -> bool:
         return False
     
     try:
-        content = README_PATH.read_text(encoding='utf-8')
-        original_content = content
+        content = README_PATH.read_bytes()
         
         # Format the new count with commas for consistency everywhere
-        formatted_count = f"{new_count:,}"
+        replacement = f"{new_count:,}+".encode()
         
-        # Replace all server count patterns
-        patterns_and_replacements = [
-            (r'(\d{1,3}(?:,\d{3})*)\+(\s+MCP\s+Servers\s+Available)', f'{formatted_count}+\\2'),  # Title
-            (r'(\d{1,3}(?:,\d{3})*)\+(\s+(?:unique\s+)?servers)', f'{formatted_count}+\\2'),       # General
-        ]
-        
-        new_content = content
-        for pattern, replacement in patterns_and_replacements:
-            new_content = re.sub(pattern, replacement, new_content, flags=re.IGNORECASE)
-        changes_made = new_content != content
+        # Replace all server count patterns; without any match there is nothing to compare
+        new_content, replacements = SERVER_COUNT_RE.subn(
+            lambda match: replacement + match['tail'], content
+        )
+        changes_made = replacements > 0 and new_content != content
         
         if changes_made:
-            README_PATH.write_text(new_content, encoding='utf-8')
+            README_PATH.write_bytes(new_content)
             print(f"Updated README.md with server count: {new_count}")
             return True
         else:
@@ -193,6 +241,15 @@ async def main() -> int:
         return 2
 
 
+async def _run() -> int:
+    """Run main() and close the shared HTTP client afterwards."""
+    try:
+        return await main()
+    finally:
+        if _client is not None:
+            await _client.aclose()
+
+
 if __name__ == "__main__":
-    exit_code = asyncio.run(main())
+    exit_code = asyncio.run(_run())
     sys.exit(exit_code)
\ No newline at end of file
@@ -1,4 +1,8 @@
 import logging
+import os
+import sys
+import warnings
+from functools import lru_cache
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -14,24 +18,60 @@ class Settings(BaseSettings):
     )
 
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Get the process-wide settings, reading the environment and .env only once."""
+    return Settings()
+
+
+def __getattr__(name: str):
+    # The module-level `settings` instance was replaced by get_settings()
+    if name == "settings":
+        warnings.warn(
+            "settings.settings is deprecated; use settings.get_settings()",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Accepted spellings of a true MCPMCP_DEBUG, as pydantic parses booleans
+_TRUTHY = frozenset({"1", "true", "t", "yes", "y", "on"})
 
 # Logging
 
+class _LazyRichHandler(logging.Handler):
+    """Log handler that imports rich and builds its RichHandler on the first record."""
+
+    def __init__(self):
+        super().__init__()
+        self._handler: logging.Handler | None = None
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self._handler is None:
+            from rich.console import Console
+            from rich.logging import RichHandler
+
+            # Create console that uses stderr for MCP compatibility
+            stderr_console = Console(file=sys.stderr, force_terminal=True)
+            
+            self._handler = RichHandler(
+                show_time=False, show_path=False, rich_tracebacks=True, markup=True,
+                console=stderr_console
+            )
+            # Carry over anything configured on this wrapper before the first record
+            self._handler.setLevel(self.level)
+            if self.formatter is not None:
+                self._handler.setFormatter(self.formatter)
+        self._handler.handle(record)
+
+
 app_logger = logging.getLogger("mcp-mcp")
-app_logger.setLevel(logging.DEBUG if settings.debug else logging.INFO)
+# Read the variable directly so importing this module does not build Settings
+_debug = os.environ.get("MCPMCP_DEBUG", "").strip().lower() in _TRUTHY
+app_logger.setLevel(logging.DEBUG if _debug else logging.INFO)
 app_logger.propagate = False  # Prevent propagation to root logger
 
 if not app_logger.handlers:
-    import sys
-    from rich.console import Console
-    from rich.logging import RichHandler
-
-    # Create console that uses stderr for MCP compatibility
-    stderr_console = Console(file=sys.stderr, force_terminal=True)
-    
-    handler = RichHandler(
-        show_time=False, show_path=False, rich_tracebacks=True, markup=True,
-        console=stderr_console
-    )
-    app_logger.addHandler(handler)
+    app_logger.addHandler(_LazyRichHandler())
@@ -0,0 +1,7 @@
+"""Shared pytest configuration for the main.py test suites."""
+
+import os
+import sys
+
+# Make main.py and settings.py importable however pytest is launched
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -4,15 +4,13 @@ Test suite for main.py PoC functionality.
 Tests the core find_mcp_tool functionality and README fetching.
 """
 
+import time
+
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
 import httpx
 
-import sys
-import os
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from main import find_mcp_tool, _fetch_readme_content, _global_mcp_db
+from main import README_CACHE_TTL, README_MAX_BYTES, find_mcp_tool, _fetch_readme_content, _global_mcp_db, _readme_cache
 from db import MCPServerEntry
 
 
@@ -53,7 +51,7 @@ class TestFindMCPTool:
             assert isinstance(result["alternatives"], list)
 
             # Verify database search was called
-            mock_database.search.assert_called_once_with("weather data")
+            mock_database.search.assert_called_once_with("weather data", limit=4)
 
     @pytest.mark.asyncio
     async def test_find_mcp_tool_no_results(self, mock_database):
@@ -100,12 +98,14 @@ class TestFindMCPTool:
         mock_database.search.return_value = servers
 
         with patch('main._global_mcp_db', mock_database):
-            with patch('main._fetch_readme_content', return_value="# Primary Server\nMain server docs."):
+            with patch('main._fetch_readme_content', return_value="# Primary Server\nMain server docs.") as mock_fetch:
                 result = await find_mcp_tool("test functionality")
 
             # Assertions
             assert result["status"] == "found"
             assert result["server"]["name"] == "primary-server"
+            # Top result had a README, so runners-up are not probed
+            mock_fetch.assert_awaited_once_with("https://github.com/test/primary")
             assert len(result["alternatives"]) == 3  # Should include up to 3 alternatives
             
             # Check alternative structure (should not have README)
@@ -147,109 +147,163 @@ class TestFindMCPTool:
             assert "no-readme-server" in alt_names
 
 
+RAW_BASE = "https://raw.githubusercontent.com/test-org/test-repo/main"
+
+
 class TestFetchReadmeContent:
     """Test the _fetch_readme_content function."""
 
-    @pytest.mark.asyncio
-    async def test_fetch_readme_simple_github_url(self):
-        """Test fetching README from a simple GitHub repository URL."""
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.text = "# Test README\nThis is a test README file."
-
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get.return_value = mock_response
-            
-            result = await _fetch_readme_content("https://github.com/test-org/test-repo")
-            
-            assert result == "# Test README\nThis is a test README file."
+    @pytest.fixture(autouse=True)
+    def clear_readme_cache(self):
+        """Keep cached READMEs from leaking between tests."""
+        _readme_cache.clear()
+        yield
+        _readme_cache.clear()
 
+    @pytest.fixture
+    def serve_readmes(self, monkeypatch):
+        """
+        Install main's shared HTTP client backed by httpx.MockTransport.
+
+        Call it with a map of URL -> README text, httpx.Response or exception to
+        raise; other URLs answer 404. It returns the list of requests made.
+        """
+        def install(pages):
+            requests = []
+
+            def handler(request):
+                requests.append(request)
+                page = pages.get(str(request.url))
+                if isinstance(page, Exception):
+                    raise page
+                if isinstance(page, httpx.Response):
+                    return page
+                if page is None:
+                    return httpx.Response(404)
+                return httpx.Response(200, text=page, headers={"ETag": '"v1"'})
+
+            monkeypatch.setattr("main._http_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+            return requests
+
+        return install
+
+    @pytest.mark.parametrize(
+        "server_url, pages, expected",
+        [
+            pytest.param(
+                "https://github.com/test-org/test-repo",
+                {f"{RAW_BASE}/README.md": "# Test README\nThis is a test README file."},
+                "# Test README\nThis is a test README file.",
+                id="simple-github-url",
+            ),
+            pytest.param(
+                "https://github.com/modelcontextprotocol/servers/tree/main/src/weather",
+                {
+                    "https://raw.githubusercontent.com/modelcontextprotocol/servers/main/src/weather/README.md":
+                        "# Server README\nDetailed server documentation."
+                },
+                "# Server README\nDetailed server documentation.",
+                id="tree-path",
+            ),
+            pytest.param("https://example.com/some-repo", {}, None, id="not-github-url"),
+            pytest.param("https://github.com/incomplete", {}, None, id="invalid-github-url"),
+            pytest.param("https://github.com/test-org/test-repo", {}, None, id="no-readme-found"),
+            pytest.param(
+                "https://github.com/test-org/test-repo",
+                {f"{RAW_BASE}/README.md": httpx.ConnectError("Connection failed")},
+                None,
+                id="http-error",
+            ),
+            pytest.param(
+                "https://github.com/test-org/test-repo",
+                {f"{RAW_BASE}/README.md": httpx.ReadTimeout("Request timeout")},
+                None,
+                id="timeout",
+            ),
+        ],
+    )
     @pytest.mark.asyncio
-    async def test_fetch_readme_with_tree_path(self):
-        """Test fetching README from GitHub URL with tree path."""
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.text = "# Server README\nDetailed server documentation."
-
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get.return_value = mock_response
-            
-            result = await _fetch_readme_content("https://github.com/modelcontextprotocol/servers/tree/main/src/weather")
-            
-            assert result == "# Server README\nDetailed server documentation."
+    async def test_fetch_readme(self, serve_readmes, server_url, pages, expected):
+        """Test README lookup for a server URL against the given raw.githubusercontent.com pages."""
+        serve_readmes(pages)
+
+        assert await _fetch_readme_content(server_url) == expected
 
     @pytest.mark.asyncio
-    async def test_fetch_readme_multiple_filename_attempts(self):
+    async def test_fetch_readme_multiple_filename_attempts(self, serve_readmes):
         """Test that function tries multiple README filename variations."""
-        responses = {
-            "README.md": 404,
-            "README.txt": 404, 
-            "README": 200,
-        }
+        requests = serve_readmes({f"{RAW_BASE}/README": "Content from README"})
+
+        result = await _fetch_readme_content("https://github.com/test-org/test-repo")
         
-        def mock_get(url):
-            mock_response = MagicMock()
-            for filename, status in responses.items():
-                if filename in url:
-                    mock_response.status_code = status
-                    if status == 200:
-                        mock_response.text = f"Content from {filename}"
-                    break
-            else:
-                mock_response.status_code = 404
-            return mock_response
-
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get.side_effect = mock_get
-            
-            result = await _fetch_readme_content("https://github.com/test-org/test-repo")
-            
-            assert result == "Content from README"
+        assert result == "Content from README"
+        # Every name is probed, but only the winning candidate's body is downloaded
+        assert {str(r.url) for r in requests if r.method == "HEAD"} >= {
+            f"{RAW_BASE}/README.md", f"{RAW_BASE}/README.txt", f"{RAW_BASE}/README"
+        }
+        assert [str(r.url) for r in requests if r.method == "GET"] == [f"{RAW_BASE}/README"]
 
     @pytest.mark.asyncio
-    async def test_fetch_readme_not_github_url(self):
-        """Test that non-GitHub URLs return None."""
-        result = await _fetch_readme_content("https://example.com/some-repo")
-        assert result is None
+    async def test_fetch_readme_requires_github_host(self):
+        """Test that URLs merely mentioning github.com are not fetched."""
+        with patch('main._get_http_client') as mock_get_client:
+            result = await _fetch_readme_content("https://example.com/github.com/owner/repo")
+
+            assert result is None
+            mock_get_client.assert_not_called()
 
     @pytest.mark.asyncio
-    async def test_fetch_readme_no_readme_found(self):
-        """Test when no README file is found."""
-        mock_response = MagicMock()
-        mock_response.status_code = 404
+    async def test_fetch_readme_served_from_cache(self, serve_readmes):
+        """Test that a fresh cached README is returned without network access."""
+        requests = serve_readmes({f"{RAW_BASE}/README.md": "# Cached README"})
 
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get.return_value = mock_response
-            
-            result = await _fetch_readme_content("https://github.com/test-org/test-repo")
-            
-            assert result is None
+        first = await _fetch_readme_content("https://github.com/test-org/test-repo")
+        request_count = len(requests)
+        second = await _fetch_readme_content("https://github.com/test-org/test-repo")
+
+        assert first == second == "# Cached README"
+        assert len(requests) == request_count
 
     @pytest.mark.asyncio
-    async def test_fetch_readme_http_error(self):
-        """Test handling of HTTP errors."""
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get.side_effect = httpx.RequestError("Connection failed")
-            
-            result = await _fetch_readme_content("https://github.com/test-org/test-repo")
-            
-            assert result is None
+    async def test_fetch_readme_revalidates_stale_cache_entry(self, serve_readmes):
+        """Test that a stale cache entry is revalidated with its ETag."""
+        readme_url = f"{RAW_BASE}/README.md"
+        stale = time.monotonic() - README_CACHE_TTL - 1
+        _readme_cache["https://github.com/test-org/test-repo"] = (readme_url, "# Old README", '"abc"', stale)
+        requests = serve_readmes({readme_url: httpx.Response(304)})
+
+        result = await _fetch_readme_content("https://github.com/test-org/test-repo")
+
+        assert result == "# Old README"
+        assert [(r.method, str(r.url), r.headers.get("If-None-Match")) for r in requests] == [
+            ("GET", readme_url, '"abc"')
+        ]
 
     @pytest.mark.asyncio
-    async def test_fetch_readme_invalid_github_url(self):
-        """Test handling of malformed GitHub URLs."""
-        result = await _fetch_readme_content("https://github.com/incomplete")
-        assert result is None
+    async def test_fetch_readme_cache_is_bounded(self, serve_readmes, monkeypatch):
+        """Test that the least recently used README is evicted once the cache is full."""
+        monkeypatch.setattr("main.README_CACHE_SIZE", 2)
+        serve_readmes({
+            f"https://raw.githubusercontent.com/test-org/{repo}/main/README.md": f"# {repo}"
+            for repo in ("a", "b", "c")
+        })
+
+        await _fetch_readme_content("https://github.com/test-org/a")
+        await _fetch_readme_content("https://github.com/test-org/b")
+        await _fetch_readme_content("https://github.com/test-org/a")  # Now more recent than b
+        await _fetch_readme_content("https://github.com/test-org/c")
+
+        assert list(_readme_cache) == ["https://github.com/test-org/a", "https://github.com/test-org/c"]
 
     @pytest.mark.asyncio
-    async def test_fetch_readme_timeout_handling(self):
-        """Test that timeouts are handled gracefully."""
-        with patch('httpx.AsyncClient') as mock_client:
-            mock_client.return_value.__aenter__.return_value.get.side_effect = httpx.TimeoutException("Request timeout")
-            
-            result = await _fetch_readme_content("https://github.com/test-org/test-repo")
-            
-            assert result is None
+    async def test_fetch_readme_truncates_large_body(self, serve_readmes):
+        """Test that only the first README_MAX_BYTES of a README are read."""
+        # The cap splits a 2-byte character
+        serve_readmes({f"{RAW_BASE}/README.md": "#" + "é" * README_MAX_BYTES})
+
+        result = await _fetch_readme_content("https://github.com/test-org/test-repo")
+
+        assert result == "#" + "é" * ((README_MAX_BYTES - 1) // 2)
 
 
 class TestMainIntegration:
@@ -286,7 +340,21 @@ class TestMainIntegration:
             assert all(key in server for key in ["name", "description", "url", "category", "readme"])
             
             # Test that search query was processed correctly
-            mock_db.search.assert_called_once_with("weather forecast data")
+            mock_db.search.assert_called_once_with("weather forecast data", limit=4)
+
+    @pytest.mark.asyncio
+    async def test_lifespan_closes_shared_http_client(self, monkeypatch):
+        """Test that shutdown closes the client tools fetched READMEs with."""
+        import main
+
+        monkeypatch.setattr("main._global_mcp_db", None)
+        monkeypatch.setattr("main._http_client", None)
+        with patch('main.MCPDatabase.create', AsyncMock(return_value=MagicMock())):
+            async with main.app_lifespan(main.mcp):
+                client = main._get_http_client()
+
+        assert client.is_closed
+        assert main._http_client is None
 
     def test_response_schema_consistency(self):
         """Test that response schemas are consistent across different scenarios."""
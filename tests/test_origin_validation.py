@@ -3,152 +3,144 @@ Test Origin validation middleware for security.
 """
 
 import pytest
-from unittest.mock import AsyncMock, MagicMock
-from starlette.requests import Request
-from starlette.responses import Response
-from main import OriginValidationMiddleware
+from unittest.mock import AsyncMock
+from middleware import OriginValidationMiddleware
+
+# Every test here is a coroutine driving the ASGI middleware
+pytestmark = pytest.mark.asyncio
+
+
+async def _ok_app(scope, receive, send):
+    """Downstream ASGI app that always answers 200."""
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"OK"})
+
+
+async def _receive():
+    """ASGI receive for requests the middleware never reads the body of."""
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def _call(middleware, headers: dict[str, str]) -> tuple[int, str]:
+    """Run one HTTP request through the middleware and return (status, body)."""
+    scope = {
+        "type": "http",
+        "headers": [(name.encode(), value.encode()) for name, value in headers.items()],
+    }
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    await middleware(scope, _receive, send)
+    status = sent[0]["status"]
+    body = b"".join(message.get("body", b"") for message in sent[1:])
+    return status, body.decode()
+
+
+@pytest.fixture(scope="module")
+def middleware():
+    """One middleware instance for every request, as in the running server."""
+    return OriginValidationMiddleware(_ok_app, ["localhost", "127.0.0.1"])
 
 
 class TestOriginValidation:
     """Test the Origin validation middleware."""
 
-    @pytest.mark.asyncio
-    async def test_origin_middleware_allows_valid_origins(self):
-        """Test that valid origins are allowed."""
-        middleware = OriginValidationMiddleware(None, ["localhost", "127.0.0.1"])
-        
-        # Mock next handler
-        mock_next = AsyncMock(return_value=Response("OK", 200))
-        
-        # Test valid origins
-        valid_origins = [
+    @pytest.mark.parametrize(
+        "origin",
+        [
             "http://localhost",
-            "https://localhost", 
+            "https://localhost",
             "http://localhost:8000",
             "http://127.0.0.1",
             "https://127.0.0.1:8000",
-        ]
-        
-        for origin in valid_origins:
-            # Create mock request with valid origin and host
-            mock_request = MagicMock(spec=Request)
-            mock_request.headers = {"origin": origin, "host": "localhost:8000"}
-            
-            response = await middleware.dispatch(mock_request, mock_next)
-            
-            # Should call next handler (not blocked)
-            assert response.status_code == 200, f"Origin {origin} should be allowed"
-            mock_next.assert_called_with(mock_request)
-
-    @pytest.mark.asyncio
-    async def test_origin_middleware_blocks_invalid_origins(self):
-        """Test that invalid origins are blocked."""
-        middleware = OriginValidationMiddleware(None, ["localhost", "127.0.0.1"])
-        mock_next = AsyncMock(return_value=Response("OK", 200))
-        
-        # Invalid origins should be blocked
-        invalid_origins = [
+        ],
+    )
+    async def test_origin_middleware_allows_valid_origins(self, middleware, origin):
+        """Test that valid origins are allowed."""
+        # Request with valid origin and host
+        status, body = await _call(middleware, {"origin": origin, "host": "localhost:8000"})
+
+        # Should reach the app (not blocked)
+        assert (status, body) == (200, "OK")
+
+    @pytest.mark.parametrize(
+        "origin",
+        [
             "http://evil.com",
             "https://attacker.net",
             "http://malicious.example.com",
             "https://phishing.site",
-        ]
-        
-        for origin in invalid_origins:
-            mock_request = MagicMock(spec=Request)
-            mock_request.headers = {"origin": origin, "host": "localhost:8000"}
-            
-            response = await middleware.dispatch(mock_request, mock_next)
-            
-            assert response.status_code == 403, f"Origin {origin} should be blocked"
-            assert "Invalid origin header" in response.body.decode()
-
-    @pytest.mark.asyncio
-    async def test_origin_middleware_allows_no_origin(self):
+        ],
+    )
+    async def test_origin_middleware_blocks_invalid_origins(self, middleware, origin):
+        """Test that invalid origins are blocked."""
+        status, body = await _call(middleware, {"origin": origin, "host": "localhost:8000"})
+
+        # The app never ran, so the body is only the rejection
+        assert (status, body) == (403, "Forbidden: Invalid origin header")
+
+    async def test_origin_middleware_allows_no_origin(self, middleware):
         """Test that requests without Origin header are allowed."""
-        middleware = OriginValidationMiddleware(None, ["localhost", "127.0.0.1"])
-        mock_next = AsyncMock(return_value=Response("OK", 200))
-        
         # No origin header should be allowed (many legitimate requests don't have it)
-        mock_request = MagicMock(spec=Request)
-        mock_request.headers = {"host": "localhost:8000"}  # No origin header
-        
-        response = await middleware.dispatch(mock_request, mock_next)
-        
-        assert response.status_code == 200  # Not 403
-        mock_next.assert_called_with(mock_request)
-
-    @pytest.mark.asyncio
-    async def test_host_header_validation(self):
+        status, body = await _call(middleware, {"host": "localhost:8000"})
+
+        assert (status, body) == (200, "OK")  # Not 403
+
+    @pytest.mark.parametrize("host", ["evil.com", "attacker.net:8000", "malicious.example.com:443"])
+    async def test_host_header_validation(self, middleware, host):
         """Test that invalid Host headers are blocked."""
-        middleware = OriginValidationMiddleware(None, ["localhost", "127.0.0.1"])
-        mock_next = AsyncMock(return_value=Response("OK", 200))
-        
-        # Invalid host headers should be blocked
-        invalid_hosts = [
-            "evil.com",
-            "attacker.net:8000",
-            "malicious.example.com:443",
-        ]
-        
-        for host in invalid_hosts:
-            mock_request = MagicMock(spec=Request)
-            mock_request.headers = {"host": host}  # No origin, just invalid host
-            
-            response = await middleware.dispatch(mock_request, mock_next)
-            
-            assert response.status_code == 403, f"Host {host} should be blocked"
-            assert "Invalid host header" in response.body.decode()
-
-    @pytest.mark.asyncio
-    async def test_valid_host_headers(self):
+        status, body = await _call(middleware, {"host": host})  # No origin, just invalid host
+
+        assert (status, body) == (403, "Forbidden: Invalid host header")
+
+    @pytest.mark.parametrize(
+        "host", ["localhost", "localhost:8000", "127.0.0.1", "127.0.0.1:8080", "LocalHost:8000"]
+    )
+    async def test_valid_host_headers(self, middleware, host):
         """Test that valid Host headers are allowed."""
-        middleware = OriginValidationMiddleware(None, ["localhost", "127.0.0.1"])
-        mock_next = AsyncMock(return_value=Response("OK", 200))
-        
-        # Valid host headers should be allowed
-        valid_hosts = [
-            "localhost",
-            "localhost:8000",
-            "127.0.0.1",
-            "127.0.0.1:8080",
-        ]
-        
-        for host in valid_hosts:
-            mock_request = MagicMock(spec=Request)
-            mock_request.headers = {"host": host}
-            
-            response = await middleware.dispatch(mock_request, mock_next)
-            
-            assert response.status_code == 200, f"Host {host} should be allowed"  # Not 403
-            mock_next.assert_called_with(mock_request)
-
-    @pytest.mark.asyncio
-    async def test_combined_origin_and_host_validation(self):
+        status, body = await _call(middleware, {"host": host})
+
+        assert (status, body) == (200, "OK")  # Not 403
+
+    async def test_host_header_follows_allowed_hosts(self):
+        """Test that only the configured hosts pass the Host check."""
+        mock_next = AsyncMock(side_effect=_ok_app)
+        middleware = OriginValidationMiddleware(mock_next, ["localhost"])
+
+        status, _ = await _call(middleware, {"host": "localhost:8000"})
+        assert status == 200
+
+        status, body = await _call(middleware, {"host": "127.0.0.1:8000"})
+        assert status == 403
+        assert "Invalid host header" in body
+        mock_next.assert_awaited_once()
+
+    async def test_combined_origin_and_host_validation(self, middleware):
         """Test combined Origin and Host header validation."""
-        middleware = OriginValidationMiddleware(None, ["localhost", "127.0.0.1"])
-        mock_next = AsyncMock(return_value=Response("OK", 200))
-        
         # Both valid should work
-        mock_request = MagicMock(spec=Request)
-        mock_request.headers = {"origin": "http://localhost:8000", "host": "localhost:8000"}
-        
-        response = await middleware.dispatch(mock_request, mock_next)
-        assert response.status_code == 200  # Not 403
-        mock_next.assert_called_with(mock_request)
-        
+        status, body = await _call(middleware, {"origin": "http://localhost:8000", "host": "localhost:8000"})
+        assert (status, body) == (200, "OK")  # Not 403
+
         # Invalid origin should be blocked even with valid host
-        mock_request = MagicMock(spec=Request)
-        mock_request.headers = {"origin": "http://evil.com", "host": "localhost:8000"}
-        
-        response = await middleware.dispatch(mock_request, mock_next)
-        assert response.status_code == 403
-        assert "Invalid origin header" in response.body.decode()
-        
+        status, body = await _call(middleware, {"origin": "http://evil.com", "host": "localhost:8000"})
+        assert status == 403
+        assert "Invalid origin header" in body
+
         # Invalid host should be blocked even with valid origin
-        mock_request = MagicMock(spec=Request)
-        mock_request.headers = {"origin": "http://localhost:8000", "host": "evil.com"}
-        
-        response = await middleware.dispatch(mock_request, mock_next)
-        assert response.status_code == 403
-        assert "Invalid host header" in response.body.decode()
\ No newline at end of file
+        status, body = await _call(middleware, {"origin": "http://localhost:8000", "host": "evil.com"})
+        assert status == 403
+        assert "Invalid host header" in body
+
+    async def test_non_http_scopes_pass_through(self):
+        """Test that lifespan and other non-HTTP scopes are not validated."""
+        mock_next = AsyncMock()
+        middleware = OriginValidationMiddleware(mock_next, ["localhost", "127.0.0.1"])
+
+        scope = {"type": "lifespan"}
+        receive, send = AsyncMock(), AsyncMock()
+        await middleware(scope, receive, send)
+
+        mock_next.assert_awaited_once_with(scope, receive, send)
+        send.assert_not_awaited()